@@ -22,6 +22,7 @@ Page {
     id: configurationPage
 
     property bool crashReportEnabled: false
+    property bool fastVaultAccessEnabled: false
     property string serverUrl: ""
 
     header: AppHeader {
@@ -40,6 +41,9 @@ Page {
                     if (config.hasOwnProperty('crash_logs')) {
                         configurationPage.crashReportEnabled = config.crash_logs;
                     }
+                    if (config.hasOwnProperty('fast_vault_access')) {
+                        configurationPage.fastVaultAccessEnabled = config.fast_vault_access;
+                    }
                     if (config.hasOwnProperty('server_url')) {
                         configurationPage.serverUrl = config.server_url;
                         serverUrlField.text = config.server_url;
@@ -163,6 +167,17 @@ Page {
                         python.call('main.set_crash_logs', [checked], function () {});
                     }
                 }
+
+                ToggleOption {
+                    width: parent.width
+                    title: i18n.tr("Fast vault access")
+                    subtitle: i18n.tr("Keep the unlocked vault in a local server. Faster, but any app on this device can read and change it while unlocked")
+                    checked: configurationPage.fastVaultAccessEnabled
+                    onToggled: function (checked) {
+                        configurationPage.fastVaultAccessEnabled = checked;
+                        python.call('main.set_fast_vault_access', [checked], function () {});
+                    }
+                }
             }
         }
     }
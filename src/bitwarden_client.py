@@ -15,13 +15,13 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import json
-import traceback
+import time
 from base64 import b64encode
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from src.utils import run_bw
+from src.utils import run_bw, run_bw_stream
 
 
 @dataclass
@@ -41,14 +41,31 @@ def bitwarden_setup() -> BitwardenClientResponse:
         run_bw(["help"])
         return BitwardenClientResponse(success=True, data="")
     except Exception:
+        import traceback
+
         return BitwardenClientResponse(success=False, data=traceback.format_exc())
 
 
+STATUS_CACHE_SECONDS = 2.0
+_STATUS_CACHE: Tuple[float, Optional[BitwardenStatus]] = (0.0, None)
+
+
+def invalidate_status():
+    global _STATUS_CACHE
+    _STATUS_CACHE = (0.0, None)
+
+
 def bitwarden_status() -> BitwardenStatus:
+    global _STATUS_CACHE
+    cached_at, cached_status = _STATUS_CACHE
+    if cached_status is not None and time.monotonic() - cached_at < STATUS_CACHE_SECONDS:
+        return cached_status
+
     result = run_bw(["status"])
     json_result = result.json()
-    status = json_result.get("status", "unauthenticated")
-    return BitwardenStatus[status.upper()]
+    status = BitwardenStatus[json_result.get("status", "unauthenticated").upper()]
+    _STATUS_CACHE = (time.monotonic(), status)
+    return status
 
 
 def bitwarden_login(email: str, password: str, code: Optional[str] = None) -> BitwardenClientResponse:
@@ -58,6 +75,7 @@ def bitwarden_login(email: str, password: str, code: Optional[str] = None) -> Bi
 
     cmd.extend([email, password])
 
+    invalidate_status()
     try:
         result = run_bw(cmd)
     except Exception as e:
@@ -69,6 +87,7 @@ def bitwarden_login(email: str, password: str, code: Optional[str] = None) -> Bi
 
 
 def bitwarden_unlock(password: str) -> BitwardenClientResponse:
+    invalidate_status()
     try:
         result = run_bw(["unlock", password])
     except Exception as e:
@@ -84,23 +103,48 @@ class BitwardenItemType(Enum):
     SSH_KEY = "ssh_key"
 
 
+_ITEM_TYPES = (
+    None,
+    BitwardenItemType.LOGIN,
+    BitwardenItemType.SECURE_NOTE,
+    BitwardenItemType.CARD,
+    BitwardenItemType.IDENTITY,
+    BitwardenItemType.SSH_KEY,
+)
+
+
 def item_type_map(item_type: int) -> BitwardenItemType:
-    if item_type == 1:
-        return BitwardenItemType.LOGIN
-    elif item_type == 2:
-        return BitwardenItemType.SECURE_NOTE
-    elif item_type == 3:
-        return BitwardenItemType.CARD
-    elif item_type == 4:
-        return BitwardenItemType.IDENTITY
-    elif item_type == 5:
-        return BitwardenItemType.SSH_KEY
-    else:
+    try:
+        mapped = _ITEM_TYPES[item_type] if item_type > 0 else None
+    except (IndexError, TypeError):
+        mapped = None
+    if mapped is None:
         raise ValueError(f"Unknown item type: {item_type}")
+    return mapped
 
 
 @dataclass
 class BitwardenItem:
+    # no defaults, so plain __slots__ work here; dataclass(slots=True) needs python 3.10
+    __slots__ = (
+        "id",
+        "name",
+        "username",
+        "password",
+        "totp",
+        "notes",
+        "creation_date",
+        "revision_date",
+        "favorite",
+        "item_type",
+        "cardholder_name",
+        "brand",
+        "number",
+        "expiry_month",
+        "expiry_year",
+        "code",
+    )
+
     id: str
     name: str
     username: str
@@ -117,98 +161,81 @@ class BitwardenItem:
     expiry_month: str
     expiry_year: str
     code: str
-    raw: Dict
+
+
+_EMPTY: Dict = {}
+
+
+def _item_from_json(item: Dict) -> BitwardenItem:
+    login = item.get("login") or _EMPTY
+    card = item.get("card") or _EMPTY
+    return BitwardenItem(
+        id=item.get("id"),
+        name=item.get("name"),
+        username=login.get("username"),
+        password=login.get("password"),
+        totp=login.get("totp"),
+        notes=item.get("notes"),
+        creation_date=item.get("creationDate"),
+        revision_date=item.get("revisionDate"),
+        favorite=item.get("favorite", False),
+        item_type=item_type_map(item.get("type", 1)),
+        cardholder_name=card.get("cardholderName"),
+        brand=card.get("brand"),
+        number=card.get("number"),
+        expiry_month=card.get("expMonth"),
+        expiry_year=card.get("expYear"),
+        code=card.get("code"),
+    )
+
+
+_ITEMS_CACHE: Dict[Tuple[str, bool], List[BitwardenItem]] = {}
+# raw item JSON kept around only so edits can skip a bw get, dropped once it is this old
+RAW_CACHE_SECONDS = 900.0
+_RAW_CACHE: Dict[str, Dict] = {}
+_RAW_CACHE_EXPIRES = 0.0
+
+
+def invalidate_items():
+    _ITEMS_CACHE.clear()
+    _RAW_CACHE.clear()
+
+
+def _expire_raw_items():
+    if _RAW_CACHE and time.monotonic() >= _RAW_CACHE_EXPIRES:
+        _RAW_CACHE.clear()
 
 
 def bitwarden_list_items(session_code: str, trash: bool = False) -> List[BitwardenItem]:
+    global _RAW_CACHE_EXPIRES
+    _expire_raw_items()
+    cached = _ITEMS_CACHE.get((session_code, trash))
+    if cached is not None:
+        return cached
+
     args = ["list", "items"]
     if trash:
         args.append("--trash")
-    result = run_bw(args, env={"BW_SESSION": session_code})
-    items_list = result.json()
-
     bitwarden_items = []
-    for item in items_list:
-        item_id = item.get("id")
-        item_name = item.get("name")
-        item_username = item.get("login", {}).get("username")
-        item_password = item.get("login", {}).get("password")
-        item_totp = item.get("login", {}).get("totp")
-        item_notes = item.get("notes")
-        item_creation_date = item.get("creationDate")
-        item_revision_date = item.get("revisionDate")
-        item_favorite = item.get("favorite", False)
-        item_cardholder_name = item.get("card", {}).get("cardholderName")
-        item_brand = item.get("card", {}).get("brand")
-        item_number = item.get("card", {}).get("number")
-        item_expiry_month = item.get("card", {}).get("expMonth")
-        item_expiry_year = item.get("card", {}).get("expYear")
-        item_code = item.get("card", {}).get("code")
-
-        bitwarden_items.append(
-            BitwardenItem(
-                id=item_id,
-                name=item_name,
-                username=item_username,
-                password=item_password,
-                totp=item_totp,
-                notes=item_notes,
-                creation_date=item_creation_date,
-                revision_date=item_revision_date,
-                favorite=item_favorite,
-                item_type=item_type_map(item.get("type", 1)),
-                cardholder_name=item_cardholder_name,
-                brand=item_brand,
-                number=item_number,
-                expiry_month=item_expiry_month,
-                expiry_year=item_expiry_year,
-                code=item_code,
-                raw=item,
-            )
-        )
+    for item in run_bw_stream(args, env={"BW_SESSION": session_code}):
+        bitwarden_items.append(_item_from_json(item))
+        _RAW_CACHE[item.get("id")] = item
 
+    _ITEMS_CACHE[(session_code, trash)] = bitwarden_items
+    _RAW_CACHE_EXPIRES = time.monotonic() + RAW_CACHE_SECONDS
     return bitwarden_items
 
 
+def _get_raw_item(session_code: str, item_id: str) -> Dict:
+    return run_bw(["get", "item", item_id], env={"BW_SESSION": session_code}).json()
+
+
 def bitwarden_get_item(session_code: str, item_id: str) -> BitwardenItem:
-    result = run_bw(["get", "item", item_id], env={"BW_SESSION": session_code})
-    item = result.json()
-
-    item_id = item.get("id")
-    item_name = item.get("name")
-    item_username = item.get("login", {}).get("username")
-    item_password = item.get("login", {}).get("password")
-    item_totp = item.get("login", {}).get("totp")
-    item_notes = item.get("notes")
-    item_creation_date = item.get("creationDate")
-    item_revision_date = item.get("revisionDate")
-    item_favorite = item.get("favorite", False)
-    item_cardholder_name = item.get("card", {}).get("cardholderName")
-    item_brand = item.get("card", {}).get("brand")
-    item_number = item.get("card", {}).get("number")
-    item_expiry_month = item.get("card", {}).get("expMonth")
-    item_expiry_year = item.get("card", {}).get("expYear")
-    item_code = item.get("card", {}).get("code")
+    return _item_from_json(_get_raw_item(session_code, item_id))
 
-    return BitwardenItem(
-        id=item_id,
-        name=item_name,
-        username=item_username,
-        password=item_password,
-        totp=item_totp,
-        notes=item_notes,
-        creation_date=item_creation_date,
-        revision_date=item_revision_date,
-        favorite=item_favorite,
-        item_type=item_type_map(item.get("type", 1)),
-        cardholder_name=item_cardholder_name,
-        brand=item_brand,
-        number=item_number,
-        expiry_month=item_expiry_month,
-        expiry_year=item_expiry_year,
-        code=item_code,
-        raw=item,
-    )
+
+def _encode_item(item: Dict) -> str:
+    return b64encode(json.dumps(item, separators=(",", ":")).encode()).decode("ascii")
 
 
 def bitwarden_save_item(
@@ -276,9 +303,10 @@ def bitwarden_save_item(
     }
 
     try:
-        run_bw(["create", "item", b64encode(json.dumps(item).encode()).decode()], env={"BW_SESSION": session_code})
+        run_bw(["create", "item", _encode_item(item)], env={"BW_SESSION": session_code})
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data="")
 
 
@@ -298,8 +326,10 @@ def bitwarden_edit_item(
     code: Optional[str] = "",
     favorite: Optional[bool] = False,
 ):
-    item = bitwarden_get_item(session_code, id)
-    raw_item = item.raw
+    _expire_raw_items()
+    raw_item = _RAW_CACHE.get(id) or _get_raw_item(session_code, id)
+    # raw_item is edited in place, so nothing cached may keep pointing at it
+    invalidate_items()
 
     if name:
         raw_item["name"] = name
@@ -328,9 +358,7 @@ def bitwarden_edit_item(
         raw_item["favorite"] = favorite
 
     try:
-        run_bw(
-            ["edit", "item", id, b64encode(json.dumps(raw_item).encode()).decode()], env={"BW_SESSION": session_code}
-        )
+        run_bw(["edit", "item", id, _encode_item(raw_item)], env={"BW_SESSION": session_code})
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
     return BitwardenClientResponse(success=True, data="")
@@ -341,22 +369,27 @@ def bitwarden_sync(session_code: str) -> BitwardenClientResponse:
         result = run_bw(["sync"], env={"BW_SESSION": session_code})
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data=result.data)
 
 
 def bitwarden_set_server(url: str) -> BitwardenClientResponse:
+    invalidate_status()
     try:
         result = run_bw(["config", "server", url])
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data=result.data)
 
 
 def bitwarden_logout() -> BitwardenClientResponse:
+    invalidate_status()
     try:
         result = run_bw(["logout"])
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data=result.data)
 
 
@@ -368,6 +401,7 @@ def bitwarden_delete_item(session_code: str, item_id: str, permanent: bool = Fal
         result = run_bw(args, env={"BW_SESSION": session_code})
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data=result.data)
 
 
@@ -377,4 +411,5 @@ def bitwarden_restore_item(session_code: str, item_id: str) -> BitwardenClientRe
         result = run_bw(args, env={"BW_SESSION": session_code})
     except Exception as e:
         return BitwardenClientResponse(success=False, data=str(e))
+    invalidate_items()
     return BitwardenClientResponse(success=True, data=result.data)
@@ -19,16 +19,25 @@ from src.constants import (
     CRASH_REPORT_URL,
 )
 from src.ut_components import setup
-from src.utils import parse_bw_date
+from src.utils import (
+    get_bw_serve_enabled,
+    parse_bw_date,
+    set_bw_serve_enabled,
+    stop_bw_serve,
+)
 
 setup(APP_NAME, CRASH_REPORT_URL)
-import secrets
+import functools
+import os
 import string
+import threading
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import Callable, List, Optional
 
 from src.bitwarden_client import (
+    BitwardenItem,
     BitwardenItemType,
     BitwardenStatus,
     bitwarden_delete_item,
@@ -44,20 +53,44 @@ from src.bitwarden_client import (
     bitwarden_sync,
     bitwarden_unlock,
 )
-from src.totp import generate_totp
+from src.totp import generate_totp, generate_totps
 from src.ut_components.crash import crash_reporter, get_crash_report, set_crash_report
 from src.ut_components.kv import KV
 from src.ut_components.utils import dataclass_to_dict
 
+_PASSWORD_ALPHABET = (string.ascii_letters + string.digits).encode("ascii")
+_PASSWORD_REJECT_FROM = 256 - 256 % len(_PASSWORD_ALPHABET)
+# cleared while the post-login sync is running
+_SYNC_IDLE = threading.Event()
+_SYNC_IDLE.set()
+# connection shared by everything a single ui call does, see _with_kv
+_KV: "ContextVar[Optional[KV]]" = ContextVar("kv", default=None)
+
+
+def _with_kv(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _KV.get() is not None:
+            return func(*args, **kwargs)
+        with KV() as kv:
+            token = _KV.set(kv)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _KV.reset(token)
+
+    return wrapper
 
+
+@_with_kv
 def setup_bw():
-    with KV() as kv:
-        setup_done = kv.put("sealed.setup_done", False) or False
-        if not setup_done:
-            setup = bitwarden_setup()
-            if not setup.success:
-                raise Exception(f"failed to setup ({setup.success}) bitwarden with error: {setup.data}")
-            kv.put("sealed.setup_done", True)
+    kv = _KV.get()
+    setup_done = kv.put("sealed.setup_done", False) or False
+    if not setup_done:
+        setup = bitwarden_setup()
+        if not setup.success:
+            raise Exception(f"failed to setup ({setup.success}) bitwarden with error: {setup.data}")
+        kv.put("sealed.setup_done", True)
 
 
 @dataclass
@@ -80,6 +113,7 @@ class LoginScreen:
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def login_screen() -> LoginScreen:
     setup_bw()
 
@@ -98,6 +132,7 @@ def login_screen() -> LoginScreen:
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def login(email: str = "", password: str = "", code: str = "") -> StandardBitwardenResponse:
     if email:
         session_code = bitwarden_login(email, password, code)
@@ -107,13 +142,65 @@ def login(email: str = "", password: str = "", code: str = "") -> StandardBitwar
         session_code = bitwarden_unlock(password)
         if not session_code.success:
             return StandardBitwardenResponse(success=False, message=session_code.data)
-    with KV() as kv:
-        kv.put("bw.session_code", session_code.data)
+    kv = _KV.get()
+    kv.put("bw.session_code", session_code.data)
+    # the sync thread reads the session back on its own connection, it has to be committed first
+    kv.flush()
+    _start_background_sync(session_code.data)
     return StandardBitwardenResponse(success=True)
 
 
+def _background_sync(session_code: str):
+    try:
+        if bitwarden_sync(session_code).success:
+            with KV() as kv:
+                # the flag belongs to this session only, do not set it if the session changed meanwhile
+                if kv.get("bw.session_code") == session_code:
+                    kv.put("sealed.synced", True, ttl_seconds=86400)
+    finally:
+        _SYNC_IDLE.set()
+
+
+def _start_background_sync(session_code: str):
+    # sync while the user is still looking at the empty list instead of when it is first loaded
+    if not _SYNC_IDLE.is_set():
+        return
+    _SYNC_IDLE.clear()
+    threading.Thread(target=_background_sync, args=(session_code,), daemon=True).start()
+
+
+def _ensure_synced(kv: KV, session_code: str) -> bool:
+    _SYNC_IDLE.wait()
+    if kv.get("sealed.synced"):
+        return True
+    if not bitwarden_sync(session_code).success:
+        return False
+    kv.put("sealed.synced", True, ttl_seconds=86400)
+    return True
+
+
 @dataclass
 class Item:
+    __slots__ = (
+        "id",
+        "name",
+        "username",
+        "password",
+        "favorite",
+        "item_type",
+        "notes",
+        "created",
+        "updated",
+        "totp",
+        "totp_code",
+        "cardholder_name",
+        "brand",
+        "number",
+        "expiry_month",
+        "expiry_year",
+        "code",
+    )
+
     id: str
     name: str
     username: str
@@ -124,6 +211,7 @@ class Item:
     created: str
     updated: str
     totp: str
+    totp_code: str
     cardholder_name: str
     brand: str
     number: str
@@ -138,48 +226,56 @@ class ListItemsResult:
     items: List[Item]
 
 
+def _item_sort_key(item: Item):
+    return (not item.favorite, item.name.casefold())
+
+
+def _parse_items(items: List[BitwardenItem]) -> List[Item]:
+    items = [item for item in items if item.item_type in (BitwardenItemType.LOGIN, BitwardenItemType.CARD)]
+    totp_codes = generate_totps([item.totp for item in items])
+    parsed_items = []
+    for item, totp_code in zip(items, totp_codes):
+        parsed_items.append(
+            Item(
+                id=item.id,
+                name=item.name or "",
+                username=item.username or "",
+                password=item.password or "",
+                favorite=item.favorite or False,
+                item_type=item.item_type or BitwardenItemType.LOGIN,
+                notes=item.notes or "",
+                created=parse_bw_date(item.creation_date),
+                updated=parse_bw_date(item.revision_date),
+                totp=item.totp or "",
+                totp_code=totp_code,
+                cardholder_name=item.cardholder_name or "",
+                brand=item.brand or "",
+                number=item.number or "",
+                expiry_month=item.expiry_month.zfill(2) if item.expiry_month else "",
+                expiry_year=item.expiry_year.zfill(4) if item.expiry_year else "",
+                code=item.code or "",
+            )
+        )
+    parsed_items.sort(key=_item_sort_key)
+    return parsed_items
+
+
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def list_items() -> ListItemsResult:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            return ListItemsResult(success=False, items=[])
-
-        synced = kv.get("sealed.synced") or False
-        if not synced:
-            sync_result = bitwarden_sync(session_code)
-            if not sync_result.success:
-                return ListItemsResult(success=False, items=[])
-            kv.put("sealed.synced", True, ttl_seconds=86400)
-
-        items = bitwarden_list_items(session_code)
-        parsed_items = []
-        for item in items:
-            if item.item_type in (BitwardenItemType.LOGIN, BitwardenItemType.CARD):
-                parsed_items.append(
-                    Item(
-                        id=item.id,
-                        name=item.name or "",
-                        username=item.username or "",
-                        password=item.password or "",
-                        favorite=item.favorite or False,
-                        item_type=item.item_type or BitwardenItemType.LOGIN,
-                        notes=item.notes or "",
-                        created=parse_bw_date(item.creation_date),
-                        updated=parse_bw_date(item.revision_date),
-                        totp=item.totp or "",
-                        cardholder_name=item.cardholder_name or "",
-                        brand=item.brand or "",
-                        number=item.number or "",
-                        expiry_month=item.expiry_month.zfill(2) if item.expiry_month else "",
-                        expiry_year=item.expiry_year.zfill(4) if item.expiry_year else "",
-                        code=item.code or "",
-                    )
-                )
-
-    return ListItemsResult(success=True, items=sorted(parsed_items, key=lambda x: (not x.favorite, x.name)))
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        return ListItemsResult(success=False, items=[])
+
+    if not _ensure_synced(kv, session_code):
+        return ListItemsResult(success=False, items=[])
+
+    items = bitwarden_list_items(session_code)
+
+    return ListItemsResult(success=True, items=_parse_items(items))
 
 
 @dataclass
@@ -200,33 +296,35 @@ def get_totp(secret: str) -> Totp:
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def add_login(
     name: str, username: str = "", password: str = "", notes: str = "", totp: str = "", favorite: bool = False
 ):
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            raise Exception("No session code found")
-
-        result = bitwarden_save_item(
-            type=BitwardenItemType.LOGIN,
-            session_code=session_code,
-            name=name,
-            username=username,
-            password=password,
-            notes=notes,
-            totp=totp,
-            favorite=favorite,
-        )
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        raise Exception("No session code found")
+
+    result = bitwarden_save_item(
+        type=BitwardenItemType.LOGIN,
+        session_code=session_code,
+        name=name,
+        username=username,
+        password=password,
+        notes=notes,
+        totp=totp,
+        favorite=favorite,
+    )
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def add_card(
     name: str,
     cardholder_name: str = "",
@@ -237,59 +335,61 @@ def add_card(
     code: str = "",
     favorite: bool = False,
 ):
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            raise Exception("No session code found")
-
-        result = bitwarden_save_item(
-            type=BitwardenItemType.CARD,
-            session_code=session_code,
-            name=name,
-            cardholder_name=cardholder_name,
-            brand=brand,
-            number=number,
-            exp_month=exp_month,
-            exp_year=exp_year,
-            code=code,
-            favorite=favorite,
-        )
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        raise Exception("No session code found")
+
+    result = bitwarden_save_item(
+        type=BitwardenItemType.CARD,
+        session_code=session_code,
+        name=name,
+        cardholder_name=cardholder_name,
+        brand=brand,
+        number=number,
+        exp_month=exp_month,
+        exp_year=exp_year,
+        code=code,
+        favorite=favorite,
+    )
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def edit_login(
     id: str, name: str, username: str = "", password: str = "", notes: str = "", totp: str = "", favorite: bool = False
 ):
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            raise Exception("No session code found")
-
-        result = bitwarden_edit_item(
-            session_code=session_code,
-            id=id,
-            name=name,
-            username=username,
-            password=password,
-            notes=notes,
-            totp=totp,
-            favorite=favorite,
-        )
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        raise Exception("No session code found")
+
+    result = bitwarden_edit_item(
+        session_code=session_code,
+        id=id,
+        name=name,
+        username=username,
+        password=password,
+        notes=notes,
+        totp=totp,
+        favorite=favorite,
+    )
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def edit_card(
     id: str,
     name: str,
@@ -301,54 +401,58 @@ def edit_card(
     code: str = "",
     favorite: bool = False,
 ):
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            raise Exception("No session code found")
-
-        result = bitwarden_edit_item(
-            session_code=session_code,
-            id=id,
-            name=name,
-            cardholder_name=cardholder_name,
-            brand=brand,
-            number=number,
-            exp_month=exp_month,
-            exp_year=exp_year,
-            code=code,
-            favorite=favorite,
-        )
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        raise Exception("No session code found")
+
+    result = bitwarden_edit_item(
+        session_code=session_code,
+        id=id,
+        name=name,
+        cardholder_name=cardholder_name,
+        brand=brand,
+        number=number,
+        exp_month=exp_month,
+        exp_year=exp_year,
+        code=code,
+        favorite=favorite,
+    )
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def refresh() -> StandardBitwardenResponse:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
 
-        if not session_code:
-            return StandardBitwardenResponse(success=False, message="Not logged in")
+    if not session_code:
+        return StandardBitwardenResponse(success=False, message="Not logged in")
 
-        sync_result = bitwarden_sync(session_code)
-        if not sync_result.success:
-            return StandardBitwardenResponse(success=False, message="Failed to sync")
-        kv.put("sealed.synced", True, ttl_seconds=86400)
-        return StandardBitwardenResponse(success=True)
+    sync_result = bitwarden_sync(session_code)
+    if not sync_result.success:
+        return StandardBitwardenResponse(success=False, message="Failed to sync")
+    kv.put("sealed.synced", True, ttl_seconds=86400)
+    return StandardBitwardenResponse(success=True)
 
 
 @crash_reporter
+@_with_kv
 def cleanup():
-    with KV() as kv:
-        kv.delete_partial("bw")
+    stop_bw_serve()
+    kv = _KV.get()
+    kv.delete_partial("bw")
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def set_server(url: str) -> StandardBitwardenResponse:
     setup_bw()
 
@@ -356,8 +460,8 @@ def set_server(url: str) -> StandardBitwardenResponse:
     if not response.success:
         return StandardBitwardenResponse(success=False, message=response.data)
 
-    with KV() as kv:
-        kv.put("config.server_url", url)
+    kv = _KV.get()
+    kv.put("config.server_url", url)
     return StandardBitwardenResponse(success=True)
 
 
@@ -365,123 +469,116 @@ def set_server(url: str) -> StandardBitwardenResponse:
 class Configuration:
     server_url: str
     crash_logs: bool
+    fast_vault_access: bool
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def get_configuration() -> Configuration:
-    with KV() as kv:
-        server_url = kv.get("config.server_url", "bitwarden.com", True) or "bitwarden.com"
-        crash_logs = get_crash_report()
-    return Configuration(server_url=server_url, crash_logs=crash_logs)
+    kv = _KV.get()
+    server_url = kv.get("config.server_url", "bitwarden.com", True) or "bitwarden.com"
+    crash_logs = get_crash_report()
+    return Configuration(server_url=server_url, crash_logs=crash_logs, fast_vault_access=get_bw_serve_enabled())
 
 
 def set_crash_logs(enabled: bool):
     return set_crash_report(enabled)
 
 
+def set_fast_vault_access(enabled: bool):
+    return set_bw_serve_enabled(enabled)
+
+
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def logout() -> StandardBitwardenResponse:
-    with KV() as kv:
-        kv.delete_partial("sealed")
-        kv.delete_partial("bw")
-
-        response = bitwarden_logout()
-        if not response.success:
-            if "not logged in" in response.data.lower():
-                return StandardBitwardenResponse(success=True)
-            return StandardBitwardenResponse(success=False, message=response.data)
-        return StandardBitwardenResponse(success=True)
+    # let a running post-login sync finish first, it must not run bw or write its flag after this
+    _SYNC_IDLE.wait()
+    kv = _KV.get()
+    kv.delete_partial("sealed")
+    kv.delete_partial("bw")
 
+    response = bitwarden_logout()
+    if not response.success:
+        if "not logged in" in response.data.lower():
+            return StandardBitwardenResponse(success=True)
+        return StandardBitwardenResponse(success=False, message=response.data)
+    return StandardBitwardenResponse(success=True)
 
-def generate_password() -> str:
-    characters = string.ascii_letters + string.digits
-    password = "".join(secrets.choice(characters) for _ in range(16))
-    return password
+
+def generate_password(length: int = 16) -> str:
+    # one urandom read per batch instead of one per character; bytes >= 248 are
+    # rejected so every character of the 62 long alphabet stays equally likely
+    password = bytearray()
+    while len(password) < length:
+        for byte in os.urandom(2 * (length - len(password))):
+            if byte < _PASSWORD_REJECT_FROM:
+                password.append(_PASSWORD_ALPHABET[byte % len(_PASSWORD_ALPHABET)])
+                if len(password) == length:
+                    break
+    return password.decode("ascii")
 
 
 @crash_reporter
 @dataclass_to_dict
+@_with_kv
 def list_trash() -> ListItemsResult:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
-
-        if not session_code:
-            return ListItemsResult(success=False, items=[])
-
-        synced = kv.get("sealed.synced") or False
-        if not synced:
-            sync_result = bitwarden_sync(session_code)
-            if not sync_result.success:
-                return ListItemsResult(success=False, items=[])
-            kv.put("sealed.synced", True, ttl_seconds=86400)
-
-        items = bitwarden_list_items(session_code, trash=True)
-        parsed_items = []
-        for item in items:
-            if item.item_type in (BitwardenItemType.LOGIN, BitwardenItemType.CARD):
-                parsed_items.append(
-                    Item(
-                        id=item.id,
-                        name=item.name or "",
-                        username=item.username or "",
-                        password=item.password or "",
-                        favorite=item.favorite or False,
-                        item_type=item.item_type or BitwardenItemType.LOGIN,
-                        notes=item.notes or "",
-                        created=parse_bw_date(item.creation_date),
-                        updated=parse_bw_date(item.revision_date),
-                        totp=item.totp or "",
-                        cardholder_name=item.cardholder_name or "",
-                        brand=item.brand or "",
-                        number=item.number or "",
-                        expiry_month=item.expiry_month.zfill(2) if item.expiry_month else "",
-                        expiry_year=item.expiry_year.zfill(4) if item.expiry_year else "",
-                        code=item.code or "",
-                    )
-                )
-
-    return ListItemsResult(success=True, items=sorted(parsed_items, key=lambda x: (not x.favorite, x.name)))
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
+
+    if not session_code:
+        return ListItemsResult(success=False, items=[])
+
+    if not _ensure_synced(kv, session_code):
+        return ListItemsResult(success=False, items=[])
+
+    items = bitwarden_list_items(session_code, trash=True)
 
+    return ListItemsResult(success=True, items=_parse_items(items))
 
+
+@_with_kv
 def trash_item(item_id: str) -> StandardBitwardenResponse:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
 
-        if not session_code:
-            return StandardBitwardenResponse(success=False, message="Not logged in")
+    if not session_code:
+        return StandardBitwardenResponse(success=False, message="Not logged in")
 
-        result = bitwarden_delete_item(session_code, item_id)
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    result = bitwarden_delete_item(session_code, item_id)
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
+@_with_kv
 def delete_item(item_id: str) -> StandardBitwardenResponse:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
 
-        if not session_code:
-            return StandardBitwardenResponse(success=False, message="Not logged in")
+    if not session_code:
+        return StandardBitwardenResponse(success=False, message="Not logged in")
 
-        result = bitwarden_delete_item(session_code, item_id, permanent=True)
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    result = bitwarden_delete_item(session_code, item_id, permanent=True)
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
 
 
+@_with_kv
 def restore_item(item_id: str) -> StandardBitwardenResponse:
-    with KV() as kv:
-        session_code = kv.get("bw.session_code")
+    kv = _KV.get()
+    session_code = kv.get("bw.session_code")
 
-        if not session_code:
-            return StandardBitwardenResponse(success=False, message="Not logged in")
+    if not session_code:
+        return StandardBitwardenResponse(success=False, message="Not logged in")
 
-        result = bitwarden_restore_item(session_code, item_id)
-        if result.success:
-            return StandardBitwardenResponse(success=True)
-        else:
-            return StandardBitwardenResponse(success=False, message=result.data)
+    result = bitwarden_restore_item(session_code, item_id)
+    if result.success:
+        return StandardBitwardenResponse(success=True)
+    else:
+        return StandardBitwardenResponse(success=False, message=result.data)
@@ -16,29 +16,87 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import base64
 import hashlib
-import hmac
 import struct
 import time
+from functools import lru_cache
 
+_COUNTER = struct.Struct(">Q")
+_TRUNCATED = struct.Struct(">I")
+_IPAD = bytes(x ^ 0x36 for x in range(256))
+_OPAD = bytes(x ^ 0x5C for x in range(256))
 
-def generate_hotp(secret, counter, digits=6, digest=hashlib.sha1):
-    counter_bytes = struct.pack(">Q", counter)
-    hmac_digest = hmac.new(secret, counter_bytes, digest).digest()
+
+def _truncate(hmac_digest, digits):
     offset = hmac_digest[-1] & 0x0F
-    truncated = hmac_digest[offset : offset + 4]
-    code = struct.unpack(">I", truncated)[0] & 0x7FFFFFFF
-    code = code % (10**digits)
-    return str(code).zfill(digits)
+    code = _TRUNCATED.unpack_from(hmac_digest, offset)[0] & 0x7FFFFFFF
+    return code % (10**digits)
+
+
+@lru_cache(maxsize=512)
+def _hmac_pads(secret, digest):
+    # hash states with the padded key already absorbed (RFC 2104), copied for every message
+    inner = digest()
+    outer = digest()
+    if len(secret) > inner.block_size:
+        secret = digest(secret).digest()
+    secret = secret.ljust(inner.block_size, b"\0")
+    inner.update(secret.translate(_IPAD))
+    outer.update(secret.translate(_OPAD))
+    return inner, outer
+
+
+def _hmac(secret, message, digest):
+    inner, outer = _hmac_pads(secret, digest)
+    inner = inner.copy()
+    inner.update(message)
+    outer = outer.copy()
+    outer.update(inner.digest())
+    return outer.digest()
+
+
+def _hotp(secret, message, digits, digest):
+    return str(_truncate(_hmac(secret, message, digest), digits)).zfill(digits)
+
+
+def generate_hotp(secret, counter, digits=6, digest=hashlib.sha1):
+    return _hotp(secret, _COUNTER.pack(counter), digits, digest)
+
+
+@lru_cache(maxsize=512)
+def _b32(secret):
+    secret = secret.upper()
+    return base64.b32decode(secret + "=" * (-len(secret) % 8))
+
+
+# (secret, time_step, digits, digest) -> (counter, code); one entry per secret, so no eviction is needed
+_TOTP_CACHE = {}
+
+
+def _totp(secret, counter, message, time_step, digits, digest):
+    key = (secret, time_step, digits, digest)
+    cached = _TOTP_CACHE.get(key)
+    if cached is not None and cached[0] == counter:
+        return cached[1]
+
+    secret_bytes = _b32(secret) if isinstance(secret, str) else secret
+    code = _hotp(secret_bytes, message, digits, digest)
+    _TOTP_CACHE[key] = (counter, code)
+    return code
 
 
 def generate_totp(secret, time_step=30, digits=6, digest=hashlib.sha1):
     counter = int(time.time() // time_step)
-    if isinstance(secret, str):
-        secret = secret.upper()
-        padding = 8 - len(secret) % 8
-        if padding != 8:
-            secret += "=" * padding
-        secret_bytes = base64.b32decode(secret)
-    else:
-        secret_bytes = secret
-    return generate_hotp(secret_bytes, counter, digits, digest)
+    return _totp(secret, counter, _COUNTER.pack(counter), time_step, digits, digest)
+
+
+def generate_totps(secrets, time_step=30, digits=6, digest=hashlib.sha1):
+    # every secret shares the same counter block, so it is read and packed once per batch
+    counter = int(time.time() // time_step)
+    message = _COUNTER.pack(counter)
+    codes = []
+    for secret in secrets:
+        try:
+            codes.append(_totp(secret, counter, message, time_step, digits, digest) if secret else "")
+        except Exception:
+            codes.append("")
+    return codes
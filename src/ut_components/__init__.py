@@ -16,8 +16,17 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from typing import Optional
 
-APP_NAME_ = None
-CRASH_REPORT_URL_ = None
+
+class _Config:
+    __slots__ = ("app_name", "crash_report_url")
+
+    def __init__(self):
+        self.app_name: Optional[str] = None
+        self.crash_report_url: Optional[str] = None
+
+
+# shared by every component; import CONFIG itself, not its attributes, so values set by setup() are seen
+CONFIG = _Config()
 
 
 def setup(app_name: str, crash_report_url: Optional[str] = None):
@@ -25,8 +34,8 @@ def setup(app_name: str, crash_report_url: Optional[str] = None):
     Initialize the UT Components library with application configuration.
 
     This function must be called on each python file you're gonna import library components
-    the library with essential application information. It sets up global
-    variables that will be used by various components throughout the library
+    the library with essential application information. It fills in the shared
+    CONFIG object that is used by various components throughout the library
     for identifying the application and handling crash reports.
 
     Args:
@@ -48,6 +57,5 @@ def setup(app_name: str, crash_report_url: Optional[str] = None):
         ...     crash_report_url="https://api.myapp.com/crashes"
         ... )
     """
-    global APP_NAME_, CRASH_REPORT_URL_
-    APP_NAME_ = app_name
-    CRASH_REPORT_URL_ = crash_report_url
+    CONFIG.app_name = app_name
+    CONFIG.crash_report_url = crash_report_url
@@ -15,8 +15,21 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import os
+from functools import lru_cache
+from typing import Optional
 
-from . import APP_NAME_
+from . import CONFIG
+
+
+@lru_cache(maxsize=None)
+def _xdg_app_path(app_name: str, xdg_home: Optional[str], fallback: str) -> str:
+    if not xdg_home:
+        # HOME is always set on Ubuntu Touch, expanduser only adds a pwd lookup fallback on top of it
+        xdg_home = (os.environ.get("HOME") or os.path.expanduser("~")).rstrip("/") + "/" + fallback
+    return xdg_home + app_name if xdg_home.endswith("/") else xdg_home + "/" + app_name
+
+
+_APP_DIR: Optional[str] = None
 
 
 def get_config_path() -> str:
@@ -37,7 +50,7 @@ def get_config_path() -> str:
              Typically ~/.config/{app_name} or $XDG_CONFIG_HOME/{app_name}
 
     Raises:
-        AssertionError: If setup() has not been called to initialize APP_NAME_
+        RuntimeError: If setup() has not been called to set the app name
 
     Example:
         >>> from src.ut_components import setup
@@ -54,9 +67,9 @@ def get_config_path() -> str:
         >>> # Use it to store configuration files
         >>> config_file = os.path.join(config_dir, "settings.json")
     """
-    assert APP_NAME_
-    xdg_config = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
-    return os.path.join(xdg_config, APP_NAME_)
+    if not CONFIG.app_name:
+        raise RuntimeError("setup() must be called before resolving application paths")
+    return _xdg_app_path(CONFIG.app_name, os.environ.get("XDG_CONFIG_HOME"), ".config")
 
 
 def get_cache_path() -> str:
@@ -77,7 +90,7 @@ def get_cache_path() -> str:
              Typically ~/.cache/{app_name} or $XDG_CACHE_HOME/{app_name}
 
     Raises:
-        AssertionError: If setup() has not been called to initialize APP_NAME_
+        RuntimeError: If setup() has not been called to set the app name
 
     Example:
         >>> from src.ut_components import setup
@@ -95,9 +108,9 @@ def get_cache_path() -> str:
         >>> thumbnail_cache = os.path.join(cache_dir, "thumbnails")
         >>> downloaded_file = os.path.join(cache_dir, "temp_download.dat")
     """
-    assert APP_NAME_
-    xdg_cache = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
-    return os.path.join(xdg_cache, APP_NAME_)
+    if not CONFIG.app_name:
+        raise RuntimeError("setup() must be called before resolving application paths")
+    return _xdg_app_path(CONFIG.app_name, os.environ.get("XDG_CACHE_HOME"), ".cache")
 
 
 def get_app_data_path() -> str:
@@ -111,7 +124,8 @@ def get_app_data_path() -> str:
 
     The function reads the APP_DIR environment variable, which is
     automatically set by the Ubuntu Touch application confinement system
-    when the app is launched.
+    when the app is launched. It never changes for the lifetime of the
+    process, so it is only read on the first successful call.
 
     Returns:
         str: The absolute path to the application's installation directory.
@@ -134,7 +148,10 @@ def get_app_data_path() -> str:
         >>> icon_path = os.path.join(app_dir, "assets", "icon.svg")
         >>> main_qml = os.path.join(app_dir, "qml", "Main.qml")
     """
-    path = os.environ.get("APP_DIR")
-    if not path:
-        raise Exception("could not find path")
-    return path
+    global _APP_DIR
+    if _APP_DIR is None:
+        path = os.environ.get("APP_DIR")
+        if not path:
+            raise Exception("could not find path")
+        _APP_DIR = path
+    return _APP_DIR
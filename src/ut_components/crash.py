@@ -14,13 +14,29 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import atexit
 import functools
-import traceback
-from typing import Any, Callable
-
-from . import CRASH_REPORT_URL_, http
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from . import CONFIG
 from .kv import KV
 
+# process wide copy of "crash.enabled", only this module writes the key
+_CRASH_ENABLED: Optional[bool] = None
+
+CRASH_REPORT_QUEUE_SIZE = 64
+CRASH_REPORT_DEDUPE_SIZE = 128
+CRASH_REPORT_FLUSH_SECONDS = 5.0
+_REPORTS: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=CRASH_REPORT_QUEUE_SIZE)
+_SEEN_REPORTS: "OrderedDict[Tuple, None]" = OrderedDict()
+_REPORTER: Optional[threading.Thread] = None
+_REPORTER_LOCK = threading.Lock()
+
 
 def set_crash_report(enabled: bool):
     """
@@ -48,8 +64,10 @@ def set_crash_report(enabled: bool):
         >>> # Later, disable it if user opts out
         >>> set_crash_report(False)
     """
+    global _CRASH_ENABLED
     with KV() as kv:
         kv.put("crash.enabled", enabled)
+    _CRASH_ENABLED = enabled
 
 
 def get_crash_report() -> bool:
@@ -58,7 +76,9 @@ def get_crash_report() -> bool:
 
     Retrieves the crash reporting preference from the persistent key-value store.
     This function is used internally by the crash_reporter decorator to determine
-    whether to send crash reports when exceptions occur.
+    whether to send crash reports when exceptions occur. The store is only read
+    on the first call; later calls return the cached value, which
+    set_crash_report() keeps up to date.
 
     Returns:
         bool: True if crash reporting is enabled, False otherwise.
@@ -76,8 +96,69 @@ def get_crash_report() -> bool:
         >>> is_enabled = get_crash_report()
         >>> print(f"Crash reporting: {is_enabled}")  # Output: Crash reporting: True
     """
-    with KV() as kv:
-        return kv.get("crash.enabled", False, True) or False
+    global _CRASH_ENABLED
+    if _CRASH_ENABLED is None:
+        with KV() as kv:
+            _CRASH_ENABLED = kv.get("crash.enabled", False, True) or False
+    return _CRASH_ENABLED
+
+
+def _send_reports():
+    from . import http
+
+    while True:
+        url, report = _REPORTS.get()
+        try:
+            http.post(url=url, json={"report": report})
+        except Exception:
+            # a failing report must not take the reporter thread down with it
+            pass
+        finally:
+            _REPORTS.task_done()
+
+
+def _fingerprint(exc: BaseException, tb: Any) -> Tuple:
+    frames = []
+    while tb is not None:
+        frames.append((tb.tb_frame.f_code.co_filename, tb.tb_lineno))
+        tb = tb.tb_next
+    try:
+        message = str(exc)
+    except Exception:
+        message = ""
+    return (type(exc), message, tuple(frames))
+
+
+def _report_exception(url: str):
+    global _REPORTER
+    exc_type, exc, tb = sys.exc_info()
+    # identical failures are only reported once, so check before paying for formatting
+    key = _fingerprint(exc, tb)
+    with _REPORTER_LOCK:
+        if key in _SEEN_REPORTS:
+            _SEEN_REPORTS.move_to_end(key)
+            return
+        _SEEN_REPORTS[key] = None
+        if len(_SEEN_REPORTS) > CRASH_REPORT_DEDUPE_SIZE:
+            _SEEN_REPORTS.popitem(last=False)
+        if _REPORTER is None:
+            _REPORTER = threading.Thread(target=_send_reports, name="crash-reporter", daemon=True)
+            _REPORTER.start()
+
+    import traceback
+
+    try:
+        _REPORTS.put_nowait((url, "".join(traceback.format_exception(exc_type, exc, tb))))
+    except queue.Full:
+        pass
+
+
+@atexit.register
+def _flush_reports():
+    # give reports queued right before exiting a chance to go out, without hanging shutdown
+    deadline = time.monotonic() + CRASH_REPORT_FLUSH_SECONDS
+    while _REPORTS.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
 
 
 def crash_reporter(func: Callable) -> Callable:
@@ -89,9 +170,16 @@ def crash_reporter(func: Callable) -> Callable:
     The original exception is always re-raised to maintain normal error flow, ensuring
     that the application's error handling logic is not disrupted.
 
+    Reports are sent from a background thread so the exception is re-raised without
+    waiting for the network. Repeated failures (same exception, message and call stack)
+    are only reported once per process, and reports are dropped if too many are already
+    waiting to be sent.
+
     The decorator checks if crash reporting is enabled before sending any data, respecting
     user privacy preferences. It requires the library to be initialized with a valid
-    crash report URL using the setup() function.
+    crash report URL using the setup() function. If no URL is configured when the
+    function is decorated, the function is returned unchanged, since no report could
+    ever be sent for it.
 
     Args:
         func (Callable): The function to be decorated with crash reporting capability.
@@ -100,7 +188,6 @@ def crash_reporter(func: Callable) -> Callable:
         Callable: The wrapped function that includes crash reporting functionality.
 
     Raises:
-        AssertionError: If crash reporting is enabled but CRASH_REPORT_URL_ is not configured.
         Any exception raised by the decorated function is re-raised after reporting.
 
     Example:
@@ -132,15 +219,17 @@ def crash_reporter(func: Callable) -> Callable:
         ...         return data.transform()
     """
 
+    if not CONFIG.crash_report_url:
+        return func
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs) -> Any:
         try:
             return func(*args, **kwargs)
         except Exception:
-            if get_crash_report():
-                assert CRASH_REPORT_URL_
-                traceback_str = traceback.format_exc()
-                http.post(url=CRASH_REPORT_URL_, json={"report": traceback_str})
+            crash_report_url = CONFIG.crash_report_url
+            if crash_report_url and get_crash_report():
+                _report_exception(crash_report_url)
             raise
 
     return wrapper
@@ -14,14 +14,61 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import http.client
 import json as json_
-import urllib.error
+import os
+import secrets
+import socket
+import stat
+import sys
+import threading
+import time
 import urllib.parse
-import urllib.request
-from typing import Dict, Optional
+import zlib
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .mimetypes import guess_type
 
+try:
+    import orjson
+except ImportError:  # optional, apps can vendor it for faster JSON handling
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json_.loads
+    # compact like orjson output, ensure_ascii keeps the encode below a plain copy
+    _json_encoder = json_.JSONEncoder(separators=(",", ":"))
+
+    def _json_dumps(obj) -> bytes:
+        return _json_encoder.encode(obj).encode("ascii")
+
+
+# bodies announced larger than this are read the plain way instead of into one preallocated buffer
+MAX_PREALLOCATED_BODY = 64 * 1024 * 1024
+POOL_MAX_IDLE_PER_HOST = 4
+UPLOAD_CHUNK_SIZE = 64 * 1024
+REDIRECT_CODES = frozenset((301, 302, 303, 307, 308))
+# 301 and 302 turn these methods into a body-less GET, as browsers do
+_METHOD_REWRITE_CODES = frozenset((301, 302))
+_BODY_METHODS = frozenset(("POST", "PUT", "DELETE"))
+# same agent urllib.request sent before requests went through the connection pool
+_USER_AGENT = f"Python-urllib/{sys.version_info[0]}.{sys.version_info[1]}"
+
+_ACCEPT_ENCODING = "gzip, deflate"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# opt-in, a stale address is only dropped once connecting to every cached address failed
+DNS_CACHE_ENABLED = os.environ.get("UT_DNS_CACHE") == "1"
+DNS_CACHE_SECONDS = 300.0
+_DNS_CACHE: Dict[Tuple[str, int], Tuple[float, List]] = {}
+
+# idle keep-alive connections by (scheme, host, port)
+_POOL: Dict[Tuple[str, str, Optional[int]], List[http.client.HTTPConnection]] = {}
+_POOL_LOCK = threading.Lock()
+
 
 class Response:
     """
@@ -36,8 +83,9 @@ class Response:
         url (str): The URL that was requested.
         success (bool): Whether the request completed without network errors.
         status_code (int): HTTP status code (200, 404, etc.). 0 for network errors.
-        data (bytes): Raw response body as bytes.
-        text (str): Response body decoded as UTF-8 string.
+        data (bytes): Raw response body as bytes. Bodies with a known Content-Length
+            are received straight into a bytearray, which is kept as is.
+        text (str): Response body decoded as UTF-8 string, decoded on first access.
 
     Example:
         >>> from src.ut_components.http import get
@@ -50,12 +98,20 @@ class Response:
         ...     print(f"Request failed: {response.text}")
     """
 
-    def __init__(self, url: str, success: bool, status_code: int, data: bytes):
+    __slots__ = ("url", "success", "status_code", "data", "_text")
+
+    def __init__(self, url: str, success: bool, status_code: int, data: Union[bytes, bytearray]):
         self.url = url
         self.success = success
         self.status_code = status_code
         self.data = data
-        self.text = data.decode("utf-8", errors="ignore")
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode("utf-8", errors="ignore")
+        return self._text
 
     def json(self) -> Dict:
         """
@@ -63,7 +119,8 @@ class Response:
 
         Converts the response data from bytes to a Python dictionary or list
         by parsing it as JSON. This is useful for working with REST APIs that
-        return JSON responses.
+        return JSON responses. orjson is used when it is installed, otherwise
+        the standard library json module.
 
         Returns:
             Dict: Parsed JSON data as a Python dictionary or list.
@@ -77,7 +134,7 @@ class Response:
             ...     user_data = response.json()
             ...     print(f"User name: {user_data['name']}")
         """
-        return json_.loads(self.data)
+        return _json_loads(self.data)
 
     def raise_for_status(self):
         """
@@ -112,10 +169,186 @@ class Response:
         return self.__str__()
 
 
+def _read_body(response) -> Union[bytes, bytearray]:
+    length = response.headers.get("Content-Length")
+    if not length or not length.isdigit() or int(length) > MAX_PREALLOCATED_BODY:
+        return response.read()
+
+    body = bytearray(int(length))
+    received = 0
+    with memoryview(body) as view:
+        while received < len(body):
+            count = response.readinto(view[received:])
+            if not count:
+                break
+            received += count
+    del body[received:]
+    # marks the response as finished (also for empty bodies) so its connection can be reused
+    response.read()
+    return body
+
+
+class _FileUpload:
+    # a regular file framed by multipart head and tail, sent with a Content-Length and sendfile
+    __slots__ = ("head", "file", "offset", "size", "tail")
+
+    def __init__(self, head: bytes, file: IO[bytes], offset: int, size: int, tail: bytes):
+        self.head = head
+        self.file = file
+        self.offset = offset
+        self.size = size
+        self.tail = tail
+
+
+# anything other than a bytes-like body is sent with chunked transfer encoding as it is produced
+Body = Union[bytes, bytearray, Iterable[bytes], IO[bytes], _FileUpload]
+
+
+def _is_streamed(data: Optional[Body]) -> bool:
+    return data is not None and not isinstance(data, (bytes, bytearray, memoryview, _FileUpload))
+
+
+def _request_headers(headers: Optional[Dict[str, str]], data: Optional[Body]) -> Dict[str, str]:
+    request_headers = dict(headers) if headers else {}
+    names = {name.lower() for name in request_headers}
+    if "user-agent" not in names:
+        request_headers["User-Agent"] = _USER_AGENT
+    if "accept-encoding" not in names:
+        request_headers["Accept-Encoding"] = _ACCEPT_ENCODING
+    if data is not None and "content-type" not in names:
+        request_headers["Content-Type"] = "application/x-www-form-urlencoded"
+    return request_headers
+
+
+def _json_body(json: Optional[Dict], headers: Optional[Dict[str, str]]) -> Tuple[bytes, Optional[Dict[str, str]]]:
+    # request() copies the headers it is given, so the shared template is never mutated
+    if not json:
+        return b"", headers
+    if headers:
+        return _json_dumps(json), {**_JSON_HEADERS, **headers}
+    return _json_dumps(json), _JSON_HEADERS
+
+
+def _resolve(host: str, port: int) -> List:
+    now = time.monotonic()
+    cached = _DNS_CACHE.get((host, port))
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    _DNS_CACHE[(host, port)] = (now + DNS_CACHE_SECONDS, addresses)
+    return addresses
+
+
+def _create_connection(address: Tuple[str, int], timeout, source_address=None) -> socket.socket:
+    # socket.create_connection() with the getaddrinfo() step going through _resolve()
+    host, port = address
+    error: Optional[OSError] = None
+    for family, socket_type, proto, _, sockaddr in _resolve(host, port):
+        sock = socket.socket(family, socket_type, proto)
+        try:
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+    _DNS_CACHE.pop((host, port), None)
+    raise error or OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+def _checkout(key: Tuple[str, str, Optional[int]]) -> Tuple[http.client.HTTPConnection, bool]:
+    with _POOL_LOCK:
+        idle = _POOL.get(key)
+        if idle:
+            return idle.pop(), True
+    scheme, host, port = key
+    if scheme == "https":
+        connection = http.client.HTTPSConnection(host, port)
+    else:
+        connection = http.client.HTTPConnection(host, port)
+    if DNS_CACHE_ENABLED:
+        connection._create_connection = _create_connection
+    return connection, False
+
+
+def _checkin(key: Tuple[str, str, Optional[int]], connection: http.client.HTTPConnection):
+    with _POOL_LOCK:
+        idle = _POOL.setdefault(key, [])
+        if len(idle) < POOL_MAX_IDLE_PER_HOST:
+            idle.append(connection)
+            return
+    connection.close()
+
+
+def _decode_body(body: Union[bytes, bytearray], encoding: Optional[str]) -> Union[bytes, bytearray]:
+    encoding = (encoding or "").strip().lower()
+    if not body or encoding not in ("gzip", "x-gzip", "deflate"):
+        return body
+    if encoding != "deflate":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    try:
+        return zlib.decompress(body)
+    except zlib.error:
+        # some servers send a raw deflate stream without the zlib wrapper
+        return zlib.decompress(body, -zlib.MAX_WBITS)
+
+
+def _send_file_upload(
+    connection: http.client.HTTPConnection, method: str, target: str, upload: _FileUpload, headers: Dict[str, str]
+):
+    names = {name.lower() for name in headers}
+    connection.putrequest(method, target, skip_host="host" in names, skip_accept_encoding="accept-encoding" in names)
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.putheader("Content-Length", str(len(upload.head) + upload.size + len(upload.tail)))
+    connection.endheaders(upload.head)
+    # the kernel copies the file straight to the socket, tls sockets fall back to a read/send loop
+    upload.file.seek(upload.offset)
+    connection.sock.sendfile(upload.file, upload.offset, upload.size)
+    connection.send(upload.tail)
+
+
+def _send(
+    method: str, parts: urllib.parse.SplitResult, data: Optional[Body], headers: Dict[str, str]
+) -> Tuple[http.client.HTTPResponse, Union[bytes, bytearray]]:
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"unsupported url: {parts.geturl()}")
+    key = (parts.scheme, parts.hostname, parts.port)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    while True:
+        connection, reused = _checkout(key)
+        try:
+            if isinstance(data, _FileUpload):
+                _send_file_upload(connection, method, target, data, headers)
+            else:
+                connection.request(method, target, body=data, headers=headers)
+            response = connection.getresponse()
+            body = _read_body(response)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if reused and not _is_streamed(data):
+                # the server dropped the idle keep-alive connection, retry on another one
+                continue
+            raise
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close or not response.isclosed():
+            connection.close()
+        else:
+            _checkin(key, connection)
+        return response, body
+
+
 def request(
     url: str,
     method: str,
-    data: Optional[bytes] = None,
+    data: Optional[Body] = None,
     headers: Optional[Dict[str, str]] = None,
     follow_redirects: bool = True,
     max_redirects: int = 10,
@@ -128,10 +361,26 @@ def request(
     behavior. It automatically handles various redirect status codes and follows
     them according to HTTP specifications.
 
+    Connections are kept alive and reused by later requests to the same scheme,
+    host and port, so only the first request to a server pays for DNS, TCP and
+    TLS setup. A request on a reused connection that the server has meanwhile
+    closed is retried once on a new connection. Setting UT_DNS_CACHE=1 also
+    caches host name lookups for new connections for five minutes.
+
+    Responses are requested gzip or deflate compressed and decompressed before
+    they are returned, unless an Accept-Encoding header is passed explicitly.
+
+    Besides bytes, data can be an iterable of bytes chunks or a binary file
+    object. Such bodies are streamed with chunked transfer encoding instead of
+    being held in memory, but since they can only be read once they are not
+    retried on a stale connection and not resent to the target of a 307 or 308
+    redirect; the redirect response is returned instead.
+
     Args:
         url (str): The target URL for the request.
         method (str): HTTP method (GET, POST, PUT, DELETE, PATCH, etc.).
-        data (Optional[bytes]): Request body as bytes. Defaults to None.
+        data (Optional[Body]): Request body as bytes, an iterable of bytes chunks or
+            a binary file object. Defaults to None.
         headers (Optional[Dict[str, str]]): HTTP headers to include in the request.
             Defaults to empty dict.
         follow_redirects (bool): Whether to automatically follow HTTP redirects.
@@ -160,82 +409,47 @@ def request(
         ...     follow_redirects=False
         ... )
     """
-    redirect_count = 0
+    request_headers = _request_headers(headers, data)
+    # callers asking for an encoding themselves get the body exactly as it was sent
+    decompress = not headers or all(name.lower() != "accept-encoding" for name in headers)
     current_url = url
+    try:
+        current_parts = urllib.parse.urlsplit(url)
+    except ValueError as e:
+        return Response(url=url, success=False, status_code=0, data=str(e).encode())
     current_method = method
     current_data = data
 
-    while redirect_count < max_redirects:
+    # each hop is just another request on a pooled connection, same-origin redirects reuse the one just used
+    for _ in range(max_redirects):
         try:
-            request = urllib.request.Request(
-                current_url,
-                data=current_data,
-                headers=headers or {},
-                method=current_method,
-            )
-            with urllib.request.urlopen(request) as response:
-                return Response(
-                    url=current_url,
-                    success=True,
-                    status_code=response.code,
-                    data=response.read(),
-                )
-        except urllib.error.HTTPError as e:
-            if follow_redirects and e.code in (301, 302, 303, 307, 308):
-                redirect_count += 1
-                location = e.headers.get("Location")
-                if not location:
-                    error_content = b""
-                    try:
-                        if e.fp:
-                            error_content = e.fp.read()
-                    except Exception:
-                        pass
-                    return Response(
-                        url=current_url,
-                        success=False,
-                        status_code=e.code,
-                        data=error_content,
-                    )
-
-                if not location.startswith(("http://", "https://")):
-                    from urllib.parse import urljoin
-
-                    location = urljoin(current_url, location)
-
-                current_url = location
-
-                if e.code == 303 or (e.code in (301, 302) and current_method in ("POST", "PUT", "DELETE")):
-                    current_method = "GET"
-                    current_data = None
-                elif e.code in (307, 308):
-                    pass
-
-                continue
-            else:
-                error_content = b""
-                try:
-                    if e.fp:
-                        error_content = e.fp.read()
-                except Exception:
-                    pass
-
-                return Response(
-                    url=current_url,
-                    success=False,
-                    status_code=e.code,
-                    data=error_content,
-                )
-        except urllib.error.URLError as e:
-            return Response(
-                url=current_url,
-                success=False,
-                status_code=0,
-                data=str(e.reason).encode(),
-            )
+            response, body = _send(current_method, current_parts, current_data, request_headers)
+            if decompress:
+                body = _decode_body(body, response.headers.get("Content-Encoding"))
         except Exception as e:
             return Response(url=current_url, success=False, status_code=0, data=str(e).encode())
 
+        status = response.status
+        if 200 <= status < 300:
+            return Response(url=current_url, success=True, status_code=status, data=body)
+
+        location = response.headers.get("Location")
+        if not follow_redirects or status not in REDIRECT_CODES or not location:
+            return Response(url=current_url, success=False, status_code=status, data=body)
+
+        if status == 303 or (status in _METHOD_REWRITE_CODES and current_method in _BODY_METHODS):
+            current_method = "GET"
+            current_data = None
+        elif _is_streamed(current_data):
+            # a streamed body has already been consumed and cannot be sent again
+            return Response(url=current_url, success=False, status_code=status, data=body)
+        current_parts = urllib.parse.urlsplit(location)
+        if current_parts.scheme:
+            current_url = location
+        else:
+            current_url = urllib.parse.urljoin(current_url, location)
+            current_parts = urllib.parse.urlsplit(current_url)
+
     return Response(
         url=current_url,
         success=False,
@@ -287,15 +501,7 @@ def post(url: str, json: Optional[Dict] = None, headers: Optional[Dict[str, str]
         ...     headers={"Authorization": "Bearer token123"}
         ... )
     """
-    data = b""
-    request_headers = {}
-    if json:
-        data = json_.dumps(json).encode("utf-8")
-        request_headers["Content-Type"] = "application/json"
-
-    if headers:
-        request_headers.update(headers)
-
+    data, request_headers = _json_body(json, headers)
     return request(url, method="POST", data=data, headers=request_headers)
 
 
@@ -342,15 +548,11 @@ def get(
         ...     headers={"Authorization": "Bearer token123"}
         ... )
     """
-    request_headers = {}
     if params:
         query_string = urllib.parse.urlencode(params)
         url = f"{url}?{query_string}"
 
-    if headers:
-        request_headers.update(headers)
-
-    return request(url, method="GET", headers=request_headers)
+    return request(url, method="GET", headers=headers)
 
 
 def put(url: str, json: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None) -> Response:
@@ -398,15 +600,7 @@ def put(url: str, json: Optional[Dict] = None, headers: Optional[Dict[str, str]]
         ...     headers={"Authorization": "Bearer token123"}
         ... )
     """
-    data = b""
-    request_headers = {}
-    if json:
-        data = json_.dumps(json).encode("utf-8")
-        request_headers["Content-Type"] = "application/json"
-
-    if headers:
-        request_headers.update(headers)
-
+    data, request_headers = _json_body(json, headers)
     return request(url, method="PUT", data=data, headers=request_headers)
 
 
@@ -452,21 +646,13 @@ def delete(url: str, json: Optional[Dict] = None, headers: Optional[Dict[str, st
         ...     headers={"Authorization": "Bearer token123"}
         ... )
     """
-    data = b""
-    request_headers = {}
-    if json:
-        data = json_.dumps(json).encode("utf-8")
-        request_headers["Content-Type"] = "application/json"
-
-    if headers:
-        request_headers.update(headers)
-
+    data, request_headers = _json_body(json, headers)
     return request(url, method="DELETE", data=data, headers=request_headers)
 
 
 def post_file(
     url: str,
-    file_data: bytes,
+    file_data: Union[bytes, IO[bytes]],
     file_name: str,
     file_field: str,
     form_fields: Optional[Dict[str, str]] = None,
@@ -480,10 +666,16 @@ def post_file(
     and can include additional form fields alongside the file. This is commonly
     used for uploading images, documents, or other files to web services.
 
+    When file_data is a binary file object, it is never loaded into memory as a
+    whole. Files on disk are sent from the current position to the end with a
+    Content-Length, and the kernel copies them to the socket directly; other
+    streams are read in 64 KiB chunks and sent with chunked transfer encoding.
+    post_file_from_path() opens a file by path for this.
+
     Args:
         url (str): The target URL for the file upload.
-        file_data (bytes): The file content as bytes. You need to read the file
-            into memory before passing it to this function.
+        file_data (Union[bytes, IO[bytes]]): The file content as bytes, or a binary
+            file object opened for reading to stream it from disk.
         file_name (str): The name of the file being uploaded. Used for MIME type
             detection and sent to the server as the filename.
         file_field (str): The form field name for the file. This is the parameter
@@ -499,16 +691,14 @@ def post_file(
     Example:
         >>> from src.ut_components.http import post_file
         >>>
-        >>> # Upload a profile picture
+        >>> # Upload a profile picture straight from disk
         >>> with open("avatar.png", "rb") as f:
-        ...     file_content = f.read()
-        >>>
-        >>> response = post_file(
-        ...     url="https://api.example.com/upload",
-        ...     file_data=file_content,
-        ...     file_name="avatar.png",
-        ...     file_field="profile_pic"
-        ... )
+        ...     response = post_file(
+        ...         url="https://api.example.com/upload",
+        ...         file_data=f,
+        ...         file_name="avatar.png",
+        ...         file_field="profile_pic"
+        ...     )
         >>> if response.success:
         ...     result = response.json()
         ...     print(f"File uploaded: {result['url']}")
@@ -527,32 +717,157 @@ def post_file(
         ...     headers={"Authorization": "Bearer token123"}
         ... )
     """
-    boundary = "----WebKitFormBoundary7MA4YWxkTrZu0gW"
+    # random per request, so the boundary cannot turn up inside the uploaded data
+    boundary = secrets.token_hex(16)
     content_type = f"multipart/form-data; boundary={boundary}"
-
     mime_type = guess_type(file_name)[0] or "application/octet-stream"
+    data = _build_multipart(boundary, form_fields, file_field, file_name, mime_type, file_data)
 
-    body_parts = []
+    request_headers = {"Content-Type": content_type, **headers} if headers else {"Content-Type": content_type}
+    return request(url, method="POST", data=data, headers=request_headers)
+
+
+def post_file_from_path(
+    url: str,
+    path: str,
+    file_field: str,
+    form_fields: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    file_name: Optional[str] = None,
+) -> Response:
+    """
+    Upload a file from disk to a server using multipart/form-data encoding.
+
+    This is post_file() for files that are already stored on disk. The file is
+    opened and handed to the kernel to copy straight into the connection, so its
+    content never passes through Python and large uploads need no extra memory.
+
+    Args:
+        url (str): The target URL for the file upload.
+        path (str): Path of the file to upload.
+        file_field (str): The form field name for the file. This is the parameter
+            name the server expects for the file upload.
+        form_fields (Optional[Dict[str, str]]): Additional form fields to include
+            with the file upload. These are sent as regular form data. Defaults to None.
+        headers (Optional[Dict[str, str]]): Additional HTTP headers to include.
+            The Content-Type header is automatically set with the boundary. Defaults to None.
+        file_name (Optional[str]): The filename sent to the server and used for MIME
+            type detection. Defaults to the last component of path.
+
+    Returns:
+        Response: A Response object containing the server's response. Failing to
+            open the file is reported like a network error, with status code 0.
+
+    Example:
+        >>> from src.ut_components.http import post_file_from_path
+        >>>
+        >>> response = post_file_from_path(
+        ...     url="https://api.example.com/backups",
+        ...     path="/home/phablet/Documents/vault.json",
+        ...     file_field="backup",
+        ...     headers={"Authorization": "Bearer token123"}
+        ... )
+        >>> if response.success:
+        ...     print("Backup uploaded")
+    """
+    try:
+        file = open(path, "rb")
+    except OSError as e:
+        return Response(url=url, success=False, status_code=0, data=str(e).encode())
+
+    with file:
+        return post_file(url, file, file_name or os.path.basename(path), file_field, form_fields, headers)
+
+
+def _build_multipart(
+    boundary: str,
+    form_fields: Optional[Dict[str, str]],
+    file_field: str,
+    file_name: str,
+    mime_type: str,
+    file_data: Union[bytes, IO[bytes]],
+) -> Body:
+    separator = f"--{boundary}\r\n".encode()
+    body = bytearray()
 
     if form_fields:
         for field_name, field_value in form_fields.items():
-            body_parts.append(f"--{boundary}".encode())
-            body_parts.append(f'Content-Disposition: form-data; name="{field_name}"'.encode())
-            body_parts.append(b"")
-            body_parts.append(str(field_value).encode())
+            body += separator
+            body += b'Content-Disposition: form-data; name="'
+            body += field_name.encode()
+            body += b'"\r\n\r\n'
+            body += str(field_value).encode()
+            body += b"\r\n"
+
+    body += separator
+    body += f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'.encode()
+    body += f"Content-Type: {mime_type}\r\n\r\n".encode()
+    trailer = f"\r\n--{boundary}--\r\n".encode()
+
+    if hasattr(file_data, "read"):
+        size = _regular_file_size(file_data)
+        if size is not None:
+            offset = file_data.tell()
+            return _FileUpload(body, file_data, offset, size - offset, trailer)
+        return _iter_upload(body, file_data, trailer)
+    body += file_data
+    body += trailer
+    return body
+
+
+def _regular_file_size(file: IO[bytes]) -> Optional[int]:
+    try:
+        status = os.fstat(file.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    return status.st_size if stat.S_ISREG(status.st_mode) else None
+
+
+def _iter_upload(head: bytes, file: IO[bytes], tail: bytes) -> Iterator[bytes]:
+    yield head
+    yield from iter(lambda: file.read(UPLOAD_CHUNK_SIZE), b"")
+    yield tail
+
+
+def gather(calls: Iterable[Callable[[], Response]], max_workers: int = POOL_MAX_IDLE_PER_HOST) -> List[Response]:
+    """
+    Run several independent HTTP requests concurrently and collect their responses.
 
-    body_parts.append(f"--{boundary}".encode())
-    body_parts.append(f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"'.encode())
-    body_parts.append(f"Content-Type: {mime_type}".encode())
-    body_parts.append(b"")
-    body_parts.append(file_data)
+    Each call is a zero-argument callable performing one request, usually one of the
+    helpers in this module bound with functools.partial. The calls run on a small
+    thread pool and share the module's keep-alive connections, so N requests take
+    roughly as long as the slowest one instead of the sum of all of them. Calls
+    that complete synchronously, one at a time, keep working as before.
 
-    body_parts.append(f"--{boundary}--".encode())
+    Args:
+        calls (Iterable[Callable[[], Response]]): The requests to perform.
+        max_workers (int): Maximum number of requests in flight at the same time.
+            Defaults to the number of idle connections kept per host.
 
-    body = b"\r\n".join(body_parts)
+    Returns:
+        List[Response]: The responses, in the same order as the calls.
 
-    request_headers = {"Content-Type": content_type}
-    if headers:
-        request_headers.update(headers)
+    Raises:
+        Exception: Any exception raised by a call is re-raised. The request helpers
+            themselves report failures through the Response instead of raising.
+
+    Example:
+        >>> import functools
+        >>> from src.ut_components.http import gather, get
+        >>>
+        >>> # Fetch several pages at once
+        >>> responses = gather(
+        ...     functools.partial(get, "https://api.example.com/items", params={"page": str(page)})
+        ...     for page in range(1, 6)
+        ... )
+        >>> items = [item for response in responses if response.success for item in response.json()]
+    """
+    calls = list(calls)
+    if len(calls) <= 1 or max_workers <= 1:
+        return [call() for call in calls]
+
+    from concurrent.futures import ThreadPoolExecutor
 
-    return request(url, method="POST", data=body, headers=request_headers)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
@@ -17,11 +17,94 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import json
 import os
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Any, List, Optional, Tuple
+import threading
+import time
+import weakref
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .config import get_config_path
 
+try:
+    import orjson
+except ImportError:  # optional, apps can vendor it for faster JSON handling
+    orjson = None
+
+# reads only, orjson.dumps formats differently, so values are always written by the json module
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# bytes of the database file read through a memory map instead of read calls, 0 turns it off
+MMAP_SIZE = int(os.environ.get("UT_KV_MMAP", 256 * 1024 * 1024))
+# both only take effect when the database file is created, 16 KiB pages keep most values off overflow pages
+PAGE_SIZE = 16384
+AUTO_VACUUM = "INCREMENTAL"
+# opt-in, a connection keeps its file locks until it is closed, see KV.__init__
+EXCLUSIVE_LOCKING = os.environ.get("UT_KV_EXCLUSIVE") == "1"
+
+# the connection with uncommitted writes on each thread, see KV._begin_write
+_PENDING = threading.local()
+
+# expired rows are only filtered out by reads, opening a KV deletes them at most this often
+PURGE_INTERVAL_SECONDS = 3600.0
+_LAST_PURGE: Optional[float] = None
+# stands for a NULL ttl in KV.cache_ttls, real expiry times are always later
+_NO_TTL = 0
+# rows get_partial fetches and decodes per step
+GET_PARTIAL_BATCH_SIZE = 512
+# keys get_many looks up per statement, well below the 999 variables older sqlite builds allow
+GET_MANY_BATCH_SIZE = 500
+
+# stored in PRAGMA user_version, 1 keeps values as plain json instead of wrapped in {"value": ...}
+_SCHEMA_VERSION = 1
+
+# sqlite3 caches prepared statements per connection keyed by the sql text, so keep it identical across calls
+if sqlite3.sqlite_version_info >= (3, 24, 0):
+    # updates an existing row in place, replace would delete it and insert it again
+    _SQL_PUT = (
+        "INSERT INTO kv (key, value, ttl) VALUES (?, ?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value, ttl = excluded.ttl"
+    )
+else:
+    _SQL_PUT = "INSERT OR REPLACE INTO kv (key, value, ttl) VALUES (?, ?, ?)"
+_SQL_GET = "SELECT value FROM kv INDEXED BY kv_cover WHERE key = ? AND (ttl IS NULL OR ttl > ?)"
+_SQL_GET_PARTIAL = "SELECT key, value FROM kv WHERE key >= ? AND key < ? AND (ttl IS NULL OR ttl > ?) ORDER BY key"
+# sorts after every character a key can continue the prefix with, so [prefix, prefix + _KEY_MAX) is a range scan
+_KEY_MAX = "\U0010ffff"
+_SQL_DELETE = "DELETE FROM kv WHERE key = ?"
+_SQL_DELETE_PARTIAL = "DELETE FROM kv WHERE key >= ? AND key < ?"
+_SQL_PURGE = "DELETE FROM kv WHERE ttl IS NOT NULL AND ttl <= ?"
+
+
+@lru_cache(64)
+def _sql_get_many(count: int) -> str:
+    # same text for the same count, so the statement cache can reuse it
+    placeholders = ", ".join(["?"] * count)
+    return f"SELECT key, value FROM kv WHERE key IN ({placeholders}) AND (ttl IS NULL OR ttl > ?)"
+
+
+def flush_pending() -> None:
+    """
+    Commit the uncommitted writes of the KV instance used on the current thread, if any.
+
+    KV writes are deferred until flush() or close(), and while they are pending the
+    connection holds the SQLite write lock, so every other connection that wants
+    to write waits for it. Call this before anything slow or blocking that does not
+    need the open transaction, such as running a subprocess or waiting on a lock
+    another thread may hold while it writes to the store.
+
+    Example:
+        >>> from src.ut_components.kv import KV, flush_pending
+        >>>
+        >>> with KV() as kv:
+        ...     kv.put("sync.started", True)
+        ...     flush_pending()  # other threads can write while the command runs
+        ...     subprocess.run(["some", "long", "command"])
+    """
+    pending = getattr(_PENDING, "kv", None)
+    if pending is not None:
+        pending.flush()
+
 
 class KV:
     """
@@ -62,7 +145,7 @@ class KV:
         ...     kv.commit_cached()  # Single transaction for all items
     """
 
-    def __init__(self) -> None:
+    def __init__(self, check_same_thread: bool = True) -> None:
         """
         Initialize the KV storage system and create the database if needed.
 
@@ -70,8 +153,28 @@ class KV:
         (as determined by get_config_path()) and sets up the necessary
         table structure for key-value storage with TTL support.
 
+        The connection uses write-ahead logging with synchronous=NORMAL, so a
+        commit appends to the log instead of syncing the database file and
+        readers on other connections are not blocked by a writer. Reads go
+        through a memory map of the first 256 MiB of the file, which saves a
+        copy from the kernel per page read on Linux. UT_KV_MMAP sets another
+        size in bytes, 0 disables it.
+
+        Setting UT_KV_EXCLUSIVE=1 makes the connection take the database lock
+        once and keep it until close(), which saves the locking system calls
+        of every transaction. Any other connection, in this process or
+        another, then fails with "database is locked" while this one is open,
+        so it only suits programs that never have two KV instances, a KVPool
+        or memoize open at the same time.
+
         The database file is created at: {config_path}/kv.db
 
+        Args:
+            check_same_thread (bool): Whether using the instance from a thread other
+                than the one that created it raises an error. Pass False only when
+                access from several threads is serialized, as KVPool does.
+                Defaults to True.
+
         Example:
             >>> from src.ut_components.kv import KV
             >>>
@@ -84,8 +187,19 @@ class KV:
         """
         config_folder = get_config_path()
         os.makedirs(config_folder, exist_ok=True)
-        self.conn = sqlite3.connect(os.path.join(config_folder, "kv.db"))
+        self.conn = sqlite3.connect(os.path.join(config_folder, "kv.db"), check_same_thread=check_same_thread)
         self.cursor = self.conn.cursor()
+        # page size and vacuum mode have to be set before wal mode, which writes the file header
+        self.cursor.execute(f"PRAGMA page_size={PAGE_SIZE}")
+        self.cursor.execute(f"PRAGMA auto_vacuum={AUTO_VACUUM}")
+        # wal is persistent in the file, the other pragmas only apply to this connection
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA cache_size=-20000")
+        self.cursor.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        if EXCLUSIVE_LOCKING:
+            self.cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
         self.cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS kv (
@@ -95,15 +209,99 @@ class KV:
             )
         """
         )
+        # lets get and get_partial answer from the index alone without visiting the table rows
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS kv_cover ON kv (key, ttl, value)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS kv_ttl ON kv (ttl) WHERE ttl IS NOT NULL")
         self.conn.commit()
-        self.cache_values = []
-        self.cache_row_count = 0
+        # put_cached buffers one column per field, the ttls as plain 64-bit integers instead of objects
+        self.cache_keys: List[str] = []
+        self.cache_vals: List[str] = []
+        self.cache_ttls = array("q")
+        if self.cursor.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._migrate()
+        self._maybe_purge_expired()
+
+    def _migrate(self) -> None:
+        self._begin_write()
+        # take the write lock first so a second connection opening at the same time migrates nothing twice
+        self.cursor.execute("BEGIN IMMEDIATE")
+        if self.cursor.execute("PRAGMA user_version").fetchone()[0] < 1:
+            updates = []
+            empty = []
+            for key, value in self.cursor.execute("SELECT key, value FROM kv").fetchall():
+                try:
+                    updates.append((json.dumps(json.loads(value).get("value")), key))
+                except (ValueError, AttributeError):
+                    # an empty or broken value always read as missing
+                    empty.append((key,))
+            self.cursor.executemany("UPDATE kv SET value = ? WHERE key = ?", updates)
+            self.cursor.executemany(_SQL_DELETE, empty)
+        self.cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self.flush()
+
+    def _maybe_purge_expired(self) -> None:
+        global _LAST_PURGE
+
+        now = time.monotonic()
+        if _LAST_PURGE is not None and now - _LAST_PURGE < PURGE_INTERVAL_SECONDS:
+            return
+        _LAST_PURGE = now
+        # opportunistic, skip it instead of waiting when another connection is writing
+        self.cursor.execute("PRAGMA busy_timeout = 0")
+        try:
+            self.purge_expired()
+            self.incremental_vacuum()
+        except sqlite3.OperationalError:
+            self.conn.rollback()
+        finally:
+            self.cursor.execute("PRAGMA busy_timeout = 5000")
+
+    def purge_expired(self) -> None:
+        """
+        Delete all entries whose TTL has passed.
+
+        Expired entries are never returned, but they stay in the database
+        until they are purged. This happens automatically at most once an
+        hour when a KV instance is created or cached entries are committed,
+        so calling it directly is rarely needed.
+
+        Example:
+            >>> with KV() as kv:
+            ...     kv.purge_expired()
+        """
+        self._begin_write()
+        self.cursor.execute(_SQL_PURGE, (int(time.time()),))
+        self.flush()
+
+    def incremental_vacuum(self, pages: int = 0) -> None:
+        """
+        Give pages freed by deletions back to the file system.
+
+        Databases created with incremental auto vacuum keep deleted pages in a
+        free list for reuse instead of shrinking the file. This truncates the
+        file by up to the given number of free pages. It runs after every
+        automatic purge of expired entries and does nothing for databases
+        created before incremental auto vacuum was enabled.
+
+        Args:
+            pages (int): The maximum number of pages to free, 0 frees all of them.
+                Defaults to 0.
+
+        Example:
+            >>> with KV() as kv:
+            ...     kv.delete_partial("cache:")
+            ...     kv.incremental_vacuum()
+        """
+        self._begin_write()
+        # the pragma frees one page per result row, so it has to be read to the end
+        self.cursor.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        self.flush()
 
     def _encode_value(self, value: Any) -> str:
-        return json.dumps({"value": value})
+        return json.dumps(value)
 
     def _decode_value(self, value: str) -> Any:
-        return json.loads(value).get("value", None)
+        return _json_loads(value)
 
     def put(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
         """
@@ -111,7 +309,8 @@ class KV:
 
         Inserts or updates a key-value pair in the storage. The value is
         automatically serialized to JSON before storage, allowing you to
-        store complex Python objects (dicts, lists, etc.).
+        store complex Python objects (dicts, lists, etc.). The write is
+        committed by the next flush(), commit_cached() or close().
 
         Args:
             key (str): The unique identifier for the value. If the key already
@@ -141,17 +340,12 @@ class KV:
             >>> kv.close()
         """
         if ttl_seconds:
-            ttl = int((datetime.now() + timedelta(seconds=ttl_seconds)).timestamp())
+            ttl = int(time.time() + ttl_seconds)
         else:
             ttl = None
 
-        self.cursor.execute(
-            """
-            INSERT OR REPLACE INTO kv (key, value, ttl) VALUES (?, ?, ?)
-        """,
-            (key, self._encode_value(value), ttl),
-        )
-        self.conn.commit()
+        self._begin_write()
+        self.cursor.execute(_SQL_PUT, (key, self._encode_value(value), ttl))
 
     def get(
         self,
@@ -203,33 +397,58 @@ class KV:
             >>>
             >>> kv.close()
         """
-        now_seconds = int(datetime.now().timestamp())
+        now_seconds = int(time.time())
 
-        self.cursor.execute(
-            """
-            SELECT value FROM kv WHERE key = ? AND (ttl IS NULL OR ttl > ?)
-        """,
-            (key, now_seconds),
-        )
+        self.cursor.execute(_SQL_GET, (key, now_seconds))
         result = self.cursor.fetchone()
-        if result:
-            result = result[0]
-        else:
-            result = None
-
-        if not result:
+        if result is None:
             if save_default_if_not_set:
                 self.put(key, default)
             return default
 
-        return self._decode_value(result)
+        return self._decode_value(result[0])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Retrieve the values of several keys with as few queries as possible.
+
+        Looks up all given keys in one statement per 500 keys instead of one
+        per key. Keys that don't exist or have expired are left out of the
+        result, so a missing key can be told apart from a stored None.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, Any]: A dictionary mapping each found key to its value.
+            Values are automatically deserialized from JSON.
+
+        Example:
+            >>> kv = KV()
+            >>>
+            >>> kv.put("user:1", "Alice")
+            >>> kv.put("user:2", "Bob")
+            >>> users = kv.get_many(["user:1", "user:2", "user:3"])
+            >>> print(users)  # {"user:1": "Alice", "user:2": "Bob"}
+            >>>
+            >>> kv.close()
+        """
+        keys = list(dict.fromkeys(keys))
+        now_seconds = int(time.time())
+        result = {}
+        for start in range(0, len(keys), GET_MANY_BATCH_SIZE):
+            batch = keys[start : start + GET_MANY_BATCH_SIZE]
+            self.cursor.execute(_sql_get_many(len(batch)), (*batch, now_seconds))
+            for key, value in self.cursor.fetchall():
+                result[key] = _json_loads(value)
+        return result
 
     def get_partial(self, beginning: str) -> List[Tuple[str, Any]]:
         """
         Retrieve all key-value pairs where keys start with a given prefix.
 
         Performs a prefix search on keys and returns all matching entries
-        that haven't expired. Results are sorted by value (in JSON string form).
+        that haven't expired. Results are sorted by key.
         This is useful for implementing features like autocomplete, finding
         all items in a category, or retrieving related configuration options.
 
@@ -266,16 +485,16 @@ class KV:
             >>>
             >>> kv.close()
         """
-        now_seconds = int(datetime.now().timestamp())
+        now_seconds = int(time.time())
 
-        self.cursor.execute(
-            """
-            SELECT key, value FROM kv WHERE key LIKE ? || '%' AND (ttl IS NULL OR ttl > ?) ORDER BY value
-        """,
-            (beginning, now_seconds),
-        )
-        result = self.cursor.fetchall()
-        return [(x[0], self._decode_value(x[1])) for x in result]
+        self.cursor.execute(_SQL_GET_PARTIAL, (beginning, beginning + _KEY_MAX, now_seconds))
+        result = []
+        # decode in batches instead of holding every raw row next to the decoded ones
+        while True:
+            rows = self.cursor.fetchmany(GET_PARTIAL_BATCH_SIZE)
+            if not rows:
+                return result
+            result.extend([(key, _json_loads(value)) for key, value in rows])
 
     def delete(self, key: str) -> None:
         """
@@ -301,13 +520,8 @@ class KV:
             >>>
             >>> kv.close()
         """
-        self.cursor.execute(
-            """
-            DELETE FROM kv WHERE key = ?
-        """,
-            (key,),
-        )
-        self.conn.commit()
+        self._begin_write()
+        self.cursor.execute(_SQL_DELETE, (key,))
 
     def delete_partial(self, beginning: str):
         """
@@ -344,13 +558,36 @@ class KV:
             >>>
             >>> kv.close()
         """
-        self.cursor.execute(
-            """
-            DELETE FROM kv WHERE key like ? || '%'
-        """,
-            (beginning,),
-        )
+        self._begin_write()
+        self.cursor.execute(_SQL_DELETE_PARTIAL, (beginning, beginning + _KEY_MAX))
+
+    def _begin_write(self) -> None:
+        # sqlite allows one writer at a time, so a connection opened further down the same call
+        # stack would wait on our uncommitted writes forever; commit them before it writes
+        pending = getattr(_PENDING, "kv", None)
+        if pending is not None and pending is not self:
+            pending.flush()
+        _PENDING.kv = self
+
+    def flush(self) -> None:
+        """
+        Commit all writes made through this instance since the last flush.
+
+        put(), delete() and delete_partial() do not commit on their own, so a
+        series of writes shares one transaction instead of paying for a commit
+        each. The writes become visible to other connections once they are
+        flushed, which close() and leaving a with block do automatically.
+
+        Example:
+            >>> kv = KV()
+            >>> for i in range(100):
+            ...     kv.put(f"item:{i}", i)
+            >>> kv.flush()  # One commit for all 100 writes
+            >>> kv.close()
+        """
         self.conn.commit()
+        if getattr(_PENDING, "kv", None) is self:
+            _PENDING.kv = None
 
     def close(self) -> None:
         """
@@ -373,9 +610,27 @@ class KV:
             ...     kv.put("data", "value")
             >>> # close() is called automatically here
         """
-        self.conn.commit()
+        self.flush()
+        # refreshes the planner statistics, only analyzes tables that changed enough since the last run
+        self.cursor.execute("PRAGMA optimize")
         self.conn.close()
 
+    def checkpoint(self) -> None:
+        """
+        Copy the write-ahead log back into the database file and truncate it.
+
+        SQLite checkpoints the log automatically once it grows past 1000 pages,
+        and that checkpoint then runs inside whichever commit crossed the limit.
+        Long running processes can call this at a quiet moment instead, so the
+        work does not land on a time sensitive write.
+
+        Example:
+            >>> with KV() as kv:
+            ...     kv.checkpoint()
+        """
+        self.flush()
+        self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
     def __enter__(self):
         return self
 
@@ -409,7 +664,7 @@ class KV:
             >>>
             >>> # Compare with regular put (slower for bulk)
             >>> for i in range(10000, 20000):
-            ...     kv.put(f"item:{i}", {"value": i})  # 10000 separate transactions
+            ...     kv.put(f"item:{i}", {"value": i})  # 10000 separate statements
             >>>
             >>> # Cache with TTL
             >>> for i in range(100):
@@ -418,13 +673,9 @@ class KV:
             >>>
             >>> kv.close()
         """
-        if ttl_seconds:
-            ttl = int((datetime.now() + timedelta(seconds=ttl_seconds)).timestamp())
-        else:
-            ttl = None
-
-        self.cache_values.extend([key, self._encode_value(value), ttl])
-        self.cache_row_count += 1
+        self.cache_keys.append(key)
+        self.cache_vals.append(self._encode_value(value))
+        self.cache_ttls.append(int(time.time() + ttl_seconds) if ttl_seconds else _NO_TTL)
 
     def commit_cached(self) -> None:
         """
@@ -459,16 +710,185 @@ class KV:
             >>>
             >>> kv.close()
         """
-        if not self.cache_values:
+        if not self.cache_keys:
             return
 
-        values = ",".join(["(?, ?, ?)" for _ in range(self.cache_row_count)])
+        self._begin_write()
+        # one prepared statement run once per row, binding three values each time, whatever the cache size
+        ttls = [None if ttl == _NO_TTL else ttl for ttl in self.cache_ttls]
+        self.cursor.executemany(_SQL_PUT, zip(self.cache_keys, self.cache_vals, ttls))
+        self.flush()
+        self.cache_keys = []
+        self.cache_vals = []
+        self.cache_ttls = array("q")
+        self._maybe_purge_expired()
+
+
+class _ThreadSentinel:
+    # only exists to be weakly referenced, plain object() instances cannot be
+    __slots__ = ("__weakref__",)
 
-        sql = f"""
-            INSERT OR REPLACE INTO kv (key, value, ttl) VALUES {values}
+
+class KVPool:
+    """
+    A KV store that can be shared by all threads of the application.
+
+    A KV instance belongs to the thread that created it, so code running on
+    several threads would otherwise open and close a connection per call.
+    KVPool keeps one reading connection per thread and a single writing
+    connection shared by all threads behind a lock. With write-ahead logging
+    readers never wait for the writer, and every write is committed right away,
+    so it is visible to all threads and never holds the database lock.
+
+    Connections are opened on first use, close() closes all of them.
+
+    Example:
+        >>> from src.ut_components.kv import KVPool
+        >>>
+        >>> POOL = KVPool()
+        >>>
+        >>> # Safe to call from any thread
+        >>> POOL.put("job:42", {"state": "done"}, ttl_seconds=600)
+        >>> print(POOL.get("job:42"))  # {"state": "done"}
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        # reentrant, a reader finalizer can run from garbage collection while the lock is held
+        self._lock = threading.RLock()
+        self._writer: Optional[KV] = None
+        self._readers: List[KV] = []
+
+    def _reader(self) -> KV:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            # not shared, but close() may run on another thread
+            reader = self._local.reader = KV(check_same_thread=False)
+            # the thread-local sentinel goes away with its thread, closing the reader then
+            # instead of keeping a connection per finished thread until exit
+            self._local.sentinel = sentinel = _ThreadSentinel()
+            weakref.finalize(sentinel, self._release_reader, reader)
+            with self._lock:
+                self._readers.append(reader)
+        return reader
+
+    def _release_reader(self, reader: KV) -> None:
+        with self._lock:
+            try:
+                self._readers.remove(reader)
+            except ValueError:
+                # close() already took care of it
+                return
+        reader.close()
+
+    def _get_writer(self) -> KV:
+        # called with the lock held
+        if self._writer is None:
+            self._writer = KV(check_same_thread=False)
+        return self._writer
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
         """
+        Retrieve a value by its key, see KV.get().
 
-        self.cursor.execute(sql, self.cache_values)
-        self.conn.commit()
-        self.cache_values = []
-        self.cache_row_count = 0
+        Args:
+            key (str): The key to look up in the storage.
+            default (Optional[Any]): The value to return if the key is not found
+                or has expired. Defaults to None.
+
+        Returns:
+            Optional[Any]: The stored value if found and not expired, otherwise
+            the default value.
+        """
+        return self._reader().get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Retrieve the values of several keys at once, see KV.get_many().
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, Any]: A dictionary mapping each found key to its value.
+        """
+        return self._reader().get_many(keys)
+
+    def get_partial(self, beginning: str) -> List[Tuple[str, Any]]:
+        """
+        Retrieve all entries whose keys start with a prefix, see KV.get_partial().
+
+        Args:
+            beginning (str): The prefix to search for.
+
+        Returns:
+            List[Tuple[str, Any]]: A list of (key, value) tuples sorted by key.
+        """
+        return self._reader().get_partial(beginning)
+
+    def put(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """
+        Store and commit a key-value pair, see KV.put().
+
+        Args:
+            key (str): The unique identifier for the value.
+            value (Any): The value to store. Can be any JSON-serializable Python object.
+            ttl_seconds (Optional[int]): Time-to-live in seconds. Defaults to None
+                (no expiration).
+        """
+        with self._lock:
+            writer = self._get_writer()
+            writer.put(key, value, ttl_seconds)
+            writer.flush()
+
+    def put_many(self, entries: Iterable[Tuple[str, Any, Optional[int]]]) -> None:
+        """
+        Store and commit several entries in a single transaction.
+
+        Args:
+            entries (Iterable[Tuple[str, Any, Optional[int]]]): The entries to store,
+                each as a (key, value, ttl_seconds) tuple.
+        """
+        with self._lock:
+            writer = self._get_writer()
+            for key, value, ttl_seconds in entries:
+                writer.put_cached(key, value, ttl_seconds)
+            writer.commit_cached()
+
+    def delete(self, key: str) -> None:
+        """
+        Delete and commit the removal of a key, see KV.delete().
+
+        Args:
+            key (str): The key of the entry to delete.
+        """
+        with self._lock:
+            writer = self._get_writer()
+            writer.delete(key)
+            writer.flush()
+
+    def delete_partial(self, beginning: str) -> None:
+        """
+        Delete all entries whose keys start with a prefix, see KV.delete_partial().
+
+        Args:
+            beginning (str): The prefix to match.
+        """
+        with self._lock:
+            writer = self._get_writer()
+            writer.delete_partial(beginning)
+            writer.flush()
+
+    def close(self) -> None:
+        """
+        Close all connections of the pool.
+
+        The pool can still be used afterwards and opens new connections then.
+        """
+        with self._lock:
+            connections = self._readers + ([self._writer] if self._writer is not None else [])
+            self._readers = []
+            self._writer = None
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
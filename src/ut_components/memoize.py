@@ -14,19 +14,48 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import atexit
+import base64
 import functools
 import hashlib
-import json
-from typing import Any, Callable
+import pickle
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
-from .kv import KV
+from .kv import KVPool
+
+try:
+    import xxhash
+except ImportError:  # optional, apps can vendor it for faster cache keys
+    xxhash = None
+
+if xxhash is not None:
+    _raw_digest = xxhash.xxh3_128_digest
+else:
+
+    def _raw_digest(data: bytes) -> bytes:
+        # the keys only need to be unique locally, not cryptographically strong
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _digest(data: bytes) -> str:
+    # unpadded base32 keeps the 128 bits in 26 characters instead of 32 hex ones
+    return base64.b32encode(_raw_digest(data))[:26].decode("ascii").lower()
+
+
+# entries are read on the calling thread and written through one shared connection
+_POOL = KVPool()
+atexit.register(_POOL.close)
+
+# calls with only these argument types are keyed by the repr of their arguments instead of a hash
+_PLAIN_ARG_TYPES = frozenset((str, int, float, bool, type(None)))
+_PLAIN_KEY_MAX = 64
 
 
 def hash_function_name(func: Callable) -> str:
     """
     Generate a unique hash identifier for a function based on its name and module.
 
-    This helper function creates a SHA1 hash of the function's fully qualified name
+    This helper function creates a 128-bit hash of the function's fully qualified name
     (module + function name) to uniquely identify functions in the cache system.
     It ensures that functions with the same name in different modules get
     different cache keys.
@@ -35,24 +64,25 @@ def hash_function_name(func: Callable) -> str:
         func (Callable): The function object to generate a hash for.
 
     Returns:
-        str: A hexadecimal SHA1 hash string representing the function's unique identifier.
+        str: A 26 character base32 hash string representing the function's unique identifier.
+            It is an xxh3 hash when xxhash is installed, otherwise a BLAKE2b one.
 
     Example:
         >>> def my_function():
         ...     pass
         >>> hash_id = hash_function_name(my_function)
-        >>> print(hash_id)  # e.g., "a3c65c2974270fd093ee8..."
+        >>> print(hash_id)  # e.g., "updfyklqtr7obrh..."
     """
     function_name = f"{func.__module__}.{func.__name__}"
-    return hashlib.sha1(f"{function_name}".encode()).hexdigest()
+    return _digest(function_name.encode())
 
 
 def hash_function_args(args, kwargs) -> str:
     """
     Generate a unique hash identifier for function arguments.
 
-    This helper function creates a SHA1 hash of the function's arguments
-    (both positional and keyword arguments) by JSON-serializing them.
+    This helper function creates a 128-bit hash of the function's arguments
+    (both positional and keyword arguments) by pickling them.
     This allows the cache system to differentiate between different function
     calls with different arguments.
 
@@ -61,18 +91,31 @@ def hash_function_args(args, kwargs) -> str:
         kwargs: Keyword arguments passed to the function.
 
     Returns:
-        str: A hexadecimal SHA1 hash string representing the arguments' unique identifier.
+        str: A 26 character base32 hash string representing the arguments' unique identifier.
+            It is an xxh3 hash when xxhash is installed, otherwise a BLAKE2b one.
 
     Note:
-        Arguments must be JSON-serializable. Non-serializable objects like
-        custom classes, datetime objects, or sets will cause this function to fail.
+        Arguments must be picklable. Keyword arguments are sorted by name, but
+        the pickle of a value depends on more than equality: a dict with the
+        same items in another order, a set of strings in a new process, or
+        0.0 and -0.0 hash differently. Such calls miss the cache instead of
+        sharing an entry, they never return another call's result.
 
     Example:
         >>> hash_id = hash_function_args(("hello", 42), {"key": "value"})
-        >>> print(hash_id)  # e.g., "b7c4d8f2a91e3..."
+        >>> print(hash_id)  # e.g., "w7cnr4vjdizx..."
     """
-    encoded_args = f"{json.dumps(args, sort_keys=True)}-{json.dumps(kwargs, sort_keys=True)}"
-    return hashlib.sha1(f"{encoded_args}".encode()).hexdigest()
+    encoded_args = pickle.dumps((args, sorted(kwargs.items())), protocol=5)
+    return _digest(encoded_args)
+
+
+def _args_key(args, kwargs) -> str:
+    # a tuple repr starts with "(" so it can never equal a base32 digest
+    if not kwargs and all(type(arg) in _PLAIN_ARG_TYPES for arg in args):
+        key = repr(args)
+        if len(key) <= _PLAIN_KEY_MAX:
+            return key
+    return hash_function_args(args, kwargs)
 
 
 def memoize(ttl_seconds: int):
@@ -87,6 +130,7 @@ def memoize(ttl_seconds: int):
 
     The decorator uses a key-value store to persist cache across application
     restarts and creates unique cache keys based on the function name and arguments.
+    All calls share the connections of one KVPool, whichever thread they run on.
 
     Args:
         ttl_seconds (int): Time-to-live for cached results in seconds. After this
@@ -96,7 +140,8 @@ def memoize(ttl_seconds: int):
         Callable: A decorator function that can be applied to any function.
 
     Note:
-        - Function arguments must be JSON-serializable for caching to work.
+        - Function arguments must be picklable for caching to work, and return
+          values JSON-serializable.
         - Cached results are stored in a persistent KV store.
         - Each unique combination of arguments creates a separate cache entry.
 
@@ -121,27 +166,82 @@ def memoize(ttl_seconds: int):
     """
 
     def decorator(func: Callable) -> Callable:
+        key_prefix = f"memoize.{hash_function_name(func)}."
+        # everything the wrapper calls is fixed by now, bind it once instead of looking it up per call
+        args_key = _args_key
+        get = _POOL.get
+        put = _POOL.put
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            hashed_function_name = hash_function_name(func)
-            hashed_encoded_args = hash_function_args(args, kwargs)
-            with KV() as kv:
-                response = kv.get(f"memoize.{hashed_function_name}.{hashed_encoded_args}")
-                if response is not None:
-                    return response
-                result = func(*args, **kwargs)
-                kv.put(
-                    f"memoize.{hashed_function_name}.{hashed_encoded_args}",
-                    result,
-                    ttl_seconds=ttl_seconds,
-                )
-                return result
-
+            key = key_prefix + args_key(args, kwargs)
+            response = get(key)
+            if response is not None:
+                return response
+            result = func(*args, **kwargs)
+            put(key, result, ttl_seconds)
+            return result
+
+        # read by memoize_batch to build the same keys without going through the wrapper
+        wrapper._memoize_key_prefix = key_prefix
+        wrapper._memoize_ttl_seconds = ttl_seconds
         return wrapper
 
     return decorator
 
 
+def memoize_batch(calls: Iterable[Tuple[Callable, tuple, Dict[str, Any]]]) -> List[Any]:
+    """
+    Call several memoized functions at once with a single cache lookup.
+
+    Calling memoized functions one after another queries the cache once per
+    call. This function builds the cache keys of all calls first, fetches
+    every cached result in one query and then only runs the calls that missed.
+    Their results are written back to the cache in a single transaction.
+
+    Args:
+        calls (Iterable[Tuple[Callable, tuple, Dict[str, Any]]]): The calls to make,
+            each as a (function, args, kwargs) tuple. Every function must be
+            decorated with @memoize.
+
+    Returns:
+        List[Any]: The result of each call, in the order of the calls.
+
+    Raises:
+        ValueError: If one of the functions was not decorated with @memoize.
+
+    Example:
+        >>> from src.ut_components.memoize import memoize, memoize_batch
+        >>>
+        >>> @memoize(ttl_seconds=3600)
+        >>> def get_user(user_id: str):
+        ...     return fetch_from_api(user_id)
+        >>>
+        >>> # One cache query for all three users, the API is only hit for misses
+        >>> users = memoize_batch([(get_user, (user_id,), {}) for user_id in ("1", "2", "3")])
+    """
+    calls = list(calls)
+    keys = []
+    for function, args, kwargs in calls:
+        key_prefix = getattr(function, "_memoize_key_prefix", None)
+        if key_prefix is None:
+            raise ValueError(f"{function.__name__} is not memoized")
+        keys.append(key_prefix + _args_key(args, kwargs))
+
+    cached = _POOL.get_many(keys)
+    results = []
+    missed = []
+    for key, (function, args, kwargs) in zip(keys, calls):
+        result = cached.get(key)
+        if result is None:
+            result = function.__wrapped__(*args, **kwargs)
+            cached[key] = result
+            missed.append((key, result, function._memoize_ttl_seconds))
+        results.append(result)
+    _POOL.put_many(missed)
+    return results
+
+
 def delete_memoized(function: Callable):
     """
     Clear all cached entries for a specific memoized function.
@@ -177,5 +277,4 @@ def delete_memoized(function: Callable):
         >>> data3 = get_user_data("user123")  # Fetches from database
     """
     hashed_function_name = hash_function_name(function)
-    with KV() as kv:
-        kv.delete_partial(f"memoize.{hashed_function_name}")
+    _POOL.delete_partial(f"memoize.{hashed_function_name}")
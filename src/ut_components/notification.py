@@ -14,15 +14,41 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import functools
 import json
+import struct
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict
+from datetime import datetime, timedelta, timezone
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from . import http
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+PUSH_URL = "https://push.ubports.com/notify"
+EXPIRE_AFTER = timedelta(minutes=10)
+# (monotonic time it was computed at, expire_on string), reused for a second
+_expire_cache: Tuple[float, str] = (float("-inf"), "")
+# same output as json.dumps(notification.dict()), without building the dict
+_TEMPLATE = (
+    '{{"notification": {{"card": {{"icon": {}, "summary": {}, "body": {}, "popup": {}, "persist": {}}}, '
+    '"vibrate": {}, "sound": {}}}}}'
+)
+# packed layout: flags byte (popup, persist, vibrate, sound bits) and the utf-8 byte
+# lengths of icon, summary and body, followed by the three strings
+_PACKED_HEADER = struct.Struct("<BIII")
+_NOTIFICATION_FIELDS = ("icon", "summary", "body", "popup", "persist", "vibrate", "sound")
+_EMPTY: Dict = {}
+
+
+@dataclass(frozen=True)
 class Notification:
     """
     Represents a push notification for Ubuntu Touch applications.
@@ -31,6 +57,10 @@ class Notification:
     push notifications through the Ubuntu Push Notification Service.
     It provides methods for serialization to the required format.
 
+    Notifications are immutable, so dict() and dump() are only computed once
+    per instance. The dict returned by dict() is shared between calls and must
+    not be modified.
+
     Attributes:
         icon (str): The icon name or path to display with the notification.
             Should be a valid icon from the system theme or app resources.
@@ -64,6 +94,10 @@ class Notification:
         >>> json_str = notification.dump()
     """
 
+    # dataclass(slots=True) needs python 3.10, no field has a default so plain __slots__ work,
+    # _dict and _dump hold the serialized forms once computed
+    __slots__ = ("icon", "summary", "body", "popup", "persist", "vibrate", "sound", "_dict", "_dump")
+
     icon: str
     summary: str
     body: str
@@ -72,8 +106,21 @@ class Notification:
     vibrate: bool
     sound: bool
 
+    # frozen plus hand written __slots__, the default slot state restore goes through the frozen
+    # __setattr__, dataclass(frozen=True, slots=True) on 3.10+ adds the same pair
+    def __getstate__(self) -> Tuple:
+        return (self.icon, self.summary, self.body, self.popup, self.persist, self.vibrate, self.sound)
+
+    def __setstate__(self, state: Tuple) -> None:
+        for name, value in zip(_NOTIFICATION_FIELDS, state):
+            object.__setattr__(self, name, value)
+
     def dict(self) -> Dict:
-        return {
+        try:
+            return self._dict
+        except AttributeError:
+            pass
+        result = {
             "notification": {
                 "card": {
                     "icon": self.icon,
@@ -86,9 +133,70 @@ class Notification:
                 "sound": self.sound,
             }
         }
+        # frozen dataclass, the cache slots can only be filled through object.__setattr__
+        object.__setattr__(self, "_dict", result)
+        return result
 
     def dump(self) -> str:
-        return json.dumps(self.dict())
+        try:
+            return self._dump
+        except AttributeError:
+            pass
+        result = self._serialize()
+        object.__setattr__(self, "_dump", result)
+        return result
+
+    def _serialize(self) -> str:
+        if orjson is not None:
+            return orjson.dumps(self.dict()).decode()
+        try:
+            return _TEMPLATE.format(
+                encode_basestring_ascii(self.icon),
+                encode_basestring_ascii(self.summary),
+                encode_basestring_ascii(self.body),
+                _json_bool(self.popup),
+                _json_bool(self.persist),
+                _json_bool(self.vibrate),
+                _json_bool(self.sound),
+            )
+        except TypeError:
+            # non-str / non-bool field values, let json handle them
+            return json.dumps(self.dict())
+
+    def pack(self) -> bytes:
+        """
+        Serialize the notification into a compact binary payload.
+
+        Meant for passing notifications between components of the app, where the
+        JSON push format is not needed. The layout is fixed: one byte of flags
+        and the lengths of the three strings, followed by the UTF-8 encoded icon,
+        summary and body. Use parse_notification_packed to read it back, and
+        dump for the push service.
+
+        Returns:
+            bytes: The packed notification.
+
+        Example:
+            >>> from src.ut_components.notification import Notification, parse_notification_packed
+            >>>
+            >>> notification = Notification("sync", "Synced", "3 items updated", True, False, False, False)
+            >>> payload = notification.pack()
+            >>> parse_notification_packed(payload) == notification  # Output: True
+        """
+        icon = self.icon.encode()
+        summary = self.summary.encode()
+        body = self.body.encode()
+        flags = bool(self.popup) | bool(self.persist) << 1 | bool(self.vibrate) << 2 | bool(self.sound) << 3
+        return _PACKED_HEADER.pack(flags, len(icon), len(summary), len(body)) + icon + summary + body
+
+
+def _json_bool(value) -> str:
+    # identity checks, 1 and 0 compare equal to the bools but dump as numbers
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    raise TypeError(value)
 
 
 def parse_notification(raw_notification: str) -> Notification:
@@ -132,9 +240,24 @@ def parse_notification(raw_notification: str) -> Notification:
         >>> notification = parse_notification(json_data)
         >>> print(notification.summary)  # Output: "Alert"
     """
-    data = json.loads(raw_notification)
-    notification = data.get("notification", {})
-    card = notification.get("card", {})
+    data = _json_loads(raw_notification)
+    try:
+        # fast path, everything the push service normally sends is present
+        notification = data["notification"]
+        card = notification["card"]
+        return Notification(
+            icon=card["icon"],
+            summary=card["summary"],
+            body=card["body"],
+            popup=card["popup"],
+            persist=card["persist"],
+            vibrate=notification["vibrate"],
+            sound=notification["sound"],
+        )
+    except KeyError:
+        pass
+    notification = data.get("notification", _EMPTY)
+    card = notification.get("card", _EMPTY)
     return Notification(
         icon=card.get("icon", "notification"),
         summary=card.get("summary", ""),
@@ -146,6 +269,71 @@ def parse_notification(raw_notification: str) -> Notification:
     )
 
 
+class LazyNotification:
+    """
+    A notification that is only parsed when one of its fields is first read.
+
+    Behaves like the Notification returned by parse_notification for attribute
+    access, but keeps the raw JSON around until a field is actually needed. Code
+    paths that receive notifications and drop most of them without looking inside
+    skip the JSON decoding entirely. Once parsed, the Notification is cached.
+
+    Example:
+        >>> from src.ut_components.notification import parse_notification_lazy
+        >>>
+        >>> notification = parse_notification_lazy(raw_json)  # nothing is parsed yet
+        >>> print(notification.summary)  # parsed here, once
+        >>> notification.notification()  # the underlying Notification object
+    """
+
+    __slots__ = ("_raw", "_parsed")
+
+    def __init__(self, raw_notification: str):
+        self._raw = raw_notification
+        self._parsed: Optional[Notification] = None
+
+    def notification(self) -> Notification:
+        if self._parsed is None:
+            self._parsed = parse_notification(self._raw)
+            self._raw = None
+        return self._parsed
+
+    def __getattr__(self, name: str):
+        # only fields and methods of the notification, anything private or special is looked up by
+        # copy, pickle and friends on half-built instances, forwarding it would recurse forever
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.notification(), name)
+
+    def __repr__(self) -> str:
+        if self._parsed is None:
+            return f"LazyNotification({self._raw!r})"
+        return f"LazyNotification({self._parsed!r})"
+
+
+def parse_notification_lazy(raw_notification: str) -> LazyNotification:
+    """
+    Wrap a JSON notification string without parsing it yet.
+
+    Lazy counterpart of parse_notification: the JSON is decoded on the first
+    attribute access of the returned object, with the same defaults for missing
+    fields. Invalid JSON is therefore only reported at that point.
+
+    Args:
+        raw_notification (str): A JSON string in Ubuntu Push format.
+
+    Returns:
+        LazyNotification: A proxy exposing the Notification fields.
+
+    Example:
+        >>> from src.ut_components.notification import parse_notification_lazy
+        >>>
+        >>> notification = parse_notification_lazy('{"notification": {"card": {"summary": "Alert"}}}')
+        >>> print(notification.summary)  # Output: "Alert"
+    """
+    return LazyNotification(raw_notification)
+
+
 def send_notification(notification: Notification, token: str, appid: str):
     """
     Send a push notification through the Ubuntu Push Notification Service.
@@ -164,10 +352,8 @@ def send_notification(notification: Notification, token: str, appid: str):
             or as registered with the Ubuntu Push service.
 
     Raises:
-        requests.exceptions.HTTPError: If the push service returns an error
-            status code (4xx or 5xx).
-        requests.exceptions.RequestException: For network-related errors
-            during the API call.
+        ValueError: If the request failed or the push service returned an
+            error status code (4xx or 5xx).
 
     Example:
         >>> from src.ut_components.notification import Notification, send_notification
@@ -190,13 +376,157 @@ def send_notification(notification: Notification, token: str, appid: str):
         ...     appid="myapp.developer_1.0"
         ... )
     """
-    url = "https://push.ubports.com/notify"
-    expire_at = datetime.utcnow() + timedelta(minutes=10)
-    data = {
-        "appid": appid,
-        "expire_on": expire_at.isoformat() + "Z",
-        "token": token,
-        "data": notification.dict(),
-    }
-    response = http.post(url, json=data)
-    response.raise_for_status()
+    send_notifications([(notification, token, appid)])
+
+
+def send_notifications(batch: Iterable[Tuple[Notification, str, str]]) -> List[http.Response]:
+    """
+    Send several push notifications through the Ubuntu Push Notification Service.
+
+    Batched variant of send_notification. The notifications are posted concurrently
+    over the keep-alive connections of the http module, so a burst of N notifications
+    pays for a single TLS handshake per connection instead of one per notification,
+    and takes roughly as long as the slowest request instead of the sum of all of them.
+    Every notification in the batch expires 10 minutes after the batch was sent.
+
+    Args:
+        batch (Iterable[Tuple[Notification, str, str]]): The notifications to send,
+            as (notification, token, appid) tuples with the same meaning as the
+            arguments of send_notification.
+
+    Returns:
+        List[http.Response]: The responses of the push service, in batch order.
+
+    Raises:
+        ValueError: If any of the requests failed or the push service returned an
+            error status code. All notifications are sent before the first failure
+            is raised.
+
+    Example:
+        >>> from src.ut_components.notification import Notification, send_notifications
+        >>>
+        >>> notification = Notification(
+        ...     icon="mail-unread",
+        ...     summary="New mail",
+        ...     body="You have 3 unread messages",
+        ...     popup=True,
+        ...     persist=True,
+        ...     vibrate=False,
+        ...     sound=True
+        ... )
+        >>>
+        >>> # Notify every registered device of the user at once
+        >>> send_notifications(
+        ...     (notification, token, "myapp.developer_1.0")
+        ...     for token in ["abc123def456", "789ghi012jkl"]
+        ... )
+    """
+    expire_on = _expire_on()
+    calls = [
+        functools.partial(
+            http.post,
+            PUSH_URL,
+            json={
+                "appid": appid,
+                "expire_on": expire_on,
+                "token": token,
+                "data": notification.dict(),
+            },
+        )
+        for notification, token, appid in batch
+    ]
+    responses = http.gather(calls)
+    for response in responses:
+        response.raise_for_status()
+    return responses
+
+
+def send_notification_broadcast(notification: Notification, tokens: Iterable[str], appid: str) -> List[http.Response]:
+    """
+    Send the same push notification to several devices.
+
+    Convenience wrapper around send_notifications for the common fan-out case,
+    such as notifying every device a user has registered. The push service only
+    accepts one token per request, so one request is still made per device, but
+    they run concurrently over the pooled connections and share a single
+    serialized notification and expiry.
+
+    Args:
+        notification (Notification): The notification to deliver to every device.
+        tokens (Iterable[str]): The push tokens of the target devices.
+        appid (str): The application identifier, as for send_notification.
+
+    Returns:
+        List[http.Response]: The responses of the push service, in token order.
+
+    Raises:
+        ValueError: If any of the requests failed or the push service returned an
+            error status code. All notifications are sent before the first failure
+            is raised.
+
+    Example:
+        >>> from src.ut_components.notification import Notification, send_notification_broadcast
+        >>>
+        >>> notification = Notification(
+        ...     icon="security-alert",
+        ...     summary="New login",
+        ...     body="Your vault was unlocked on a new device",
+        ...     popup=True,
+        ...     persist=True,
+        ...     vibrate=True,
+        ...     sound=True
+        ... )
+        >>> send_notification_broadcast(notification, ["abc123def456", "789ghi012jkl"], "myapp.developer_1.0")
+    """
+    return send_notifications((notification, token, appid) for token in tokens)
+
+
+def _expire_on() -> str:
+    global _expire_cache
+    now = time.monotonic()
+    computed_at, expire_on = _expire_cache
+    if now - computed_at >= 1.0:
+        expire_on = (datetime.now(timezone.utc) + EXPIRE_AFTER).strftime("%Y-%m-%dT%H:%M:%SZ")
+        _expire_cache = (now, expire_on)
+    return expire_on
+
+
+def parse_notification_packed(packed: bytes) -> Notification:
+    """
+    Parse a payload produced by Notification.pack back into a Notification.
+
+    Args:
+        packed (bytes): The packed notification, as returned by Notification.pack.
+
+    Returns:
+        Notification: The unpacked notification.
+
+    Raises:
+        ValueError: If the payload is truncated or not a packed notification.
+
+    Example:
+        >>> from src.ut_components.notification import Notification, parse_notification_packed
+        >>>
+        >>> payload = Notification("alarm-clock", "Reminder", "Stand up", True, False, True, True).pack()
+        >>> notification = parse_notification_packed(payload)
+        >>> print(notification.summary)  # Output: "Reminder"
+    """
+    try:
+        flags, icon_size, summary_size, body_size = _PACKED_HEADER.unpack_from(packed)
+    except struct.error as e:
+        raise ValueError(f"Invalid packed notification: {e}") from e
+    start = _PACKED_HEADER.size
+    if len(packed) != start + icon_size + summary_size + body_size:
+        raise ValueError("Invalid packed notification: size does not match its header")
+    view = memoryview(packed)
+    summary_start = start + icon_size
+    body_start = summary_start + summary_size
+    return Notification(
+        icon=str(view[start:summary_start], "utf-8"),
+        summary=str(view[summary_start:body_start], "utf-8"),
+        body=str(view[body_start:], "utf-8"),
+        popup=bool(flags & 1),
+        persist=bool(flags & 2),
+        vibrate=bool(flags & 4),
+        sound=bool(flags & 8),
+    )
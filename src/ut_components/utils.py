@@ -17,9 +17,20 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import functools
 import secrets
 import string
-from dataclasses import asdict, is_dataclass
+from dataclasses import fields, is_dataclass
 from enum import Enum
-from typing import Any, Callable
+from typing import Any, Callable, Dict
+
+_LETTERS = string.ascii_letters.encode()
+# largest multiple of 52 below 256, bytes from here on are rejected to keep letters uniform
+_LETTERS_LIMIT = 256 - 256 % len(_LETTERS)
+# bytes.translate table mapping every accepted byte to its letter, and the rejected bytes
+_LETTERS_TABLE = bytes(_LETTERS[b % len(_LETTERS)] for b in range(_LETTERS_LIMIT)).ljust(256, b"\0")
+_LETTERS_REJECTED = bytes(range(_LETTERS_LIMIT, 256))
+# leaf types that can never contain an Enum, skipped without a call
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+# dataclass type -> serializer generated for it by _compile_serializer
+_SERIALIZERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
 
 
 def short_string():
@@ -45,7 +56,11 @@ def short_string():
         >>> temp_key = f"temp_{short_string()}"
         >>> print(temp_key)  # Output: "temp_XyZaBcDe"
     """
-    return "".join(secrets.choice(string.ascii_letters) for _ in range(8))
+    result = b""
+    while len(result) < 8:
+        # 16 bytes hold 8 accepted ones most of the time, so this is one urandom read
+        result += secrets.token_bytes(16).translate(_LETTERS_TABLE, _LETTERS_REJECTED)
+    return result[:8].decode()
 
 
 def enum_to_str(obj):
@@ -63,7 +78,9 @@ def enum_to_str(obj):
 
     Returns:
         Any: The same structure with all Enum values replaced by their string
-            representations. Non-Enum values are returned unchanged.
+            representations. Non-Enum values are returned unchanged, and dicts
+            and lists that contain no Enum are returned as is instead of copied,
+            so the input is never modified but may be shared with the result.
 
     Example:
         >>> from enum import Enum
@@ -90,14 +107,52 @@ def enum_to_str(obj):
         >>> #          "config": {"default": "active"}}
     """
     if isinstance(obj, Enum):
-        return obj.value
+        # _value_ is what the value property returns, read directly to skip the descriptor call
+        return obj._value_
     elif isinstance(obj, dict):
-        return {k: enum_to_str(v) for k, v in obj.items()}
+        return _convert_dict(obj, enum_to_str)
     elif isinstance(obj, list):
-        return [enum_to_str(item) for item in obj]
+        return _convert_list(obj, enum_to_str)
     return obj
 
 
+def _convert_dict(obj: dict, convert: Callable[[Any], Any]) -> dict:
+    # copy on the first changed value only, enum-free dicts come back untouched
+    result = None
+    for key, value in obj.items():
+        if type(value) in _PLAIN_TYPES:
+            continue
+        converted = convert(value)
+        if converted is not value:
+            if result is None:
+                result = dict(obj)
+            result[key] = converted
+    return obj if result is None else result
+
+
+def _convert_list(obj: list, convert: Callable[[Any], Any]) -> list:
+    result = None
+    for index, item in enumerate(obj):
+        if type(item) in _PLAIN_TYPES:
+            continue
+        converted = convert(item)
+        if converted is not item:
+            if result is None:
+                result = list(obj)
+            result[index] = converted
+    return obj if result is None else result
+
+
+def _convert_tuple(obj: tuple) -> tuple:
+    # asdict keeps the tuple type and converts the elements, named tuples included
+    items = [_to_plain(item) for item in obj]
+    if all(converted is item for converted, item in zip(items, obj)):
+        return obj
+    if hasattr(obj, "_fields"):
+        return type(obj)(*items)
+    return type(obj)(items)
+
+
 def dataclass_to_dict(func: Callable) -> Callable:
     """
     Decorator to automatically convert dataclass return values to dictionaries.
@@ -165,8 +220,57 @@ def dataclass_to_dict(func: Callable) -> Callable:
     def wrapper(*args, **kwargs) -> Any:
         response = func(*args, **kwargs)
         if is_dataclass(response):
-            return enum_to_str(asdict(response))  # type: ignore
+            return _dataclass_to_plain(response)
         else:
             return response
 
     return wrapper
+
+
+def _dataclass_to_plain(obj) -> Dict[str, Any]:
+    # shallow replacement for enum_to_str(asdict(obj)), only nested dataclasses and
+    # containers holding enums or dataclasses are rebuilt, everything else is shared
+    serializer = _SERIALIZERS.get(type(obj))
+    if serializer is None:
+        serializer = _SERIALIZERS[type(obj)] = _compile_serializer(type(obj))
+    return serializer(obj)
+
+
+def _compile_serializer(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    # straight-line dict literal for the fields of cls, fields annotated with a plain
+    # type or an Enum are converted inline when the value really has that type
+    namespace: Dict[str, Any] = {"_to_plain": _to_plain}
+    entries = []
+    for index, field in enumerate(fields(cls)):
+        value = f"o.{field.name}"
+        expected = f"_type{index}"
+        namespace[expected] = field.type
+        if field.type in _PLAIN_TYPES:
+            entry = f"{value} if {value}.__class__ is {expected} else _to_plain({value})"
+        elif isinstance(field.type, type) and issubclass(field.type, Enum):
+            entry = f"{value}._value_ if {value}.__class__ is {expected} else _to_plain({value})"
+        else:
+            entry = f"_to_plain({value})"
+        entries.append(f"        {field.name!r}: {entry},\n")
+    source = "def serialize(o):\n    return {\n" + "".join(entries) + "    }\n"
+    exec(compile(source, f"<serializer for {cls.__qualname__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def _to_plain(value):
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return value
+    if value_type in _SERIALIZERS:
+        return _SERIALIZERS[value_type](value)
+    if isinstance(value, Enum):
+        return value._value_
+    if isinstance(value, dict):
+        return _convert_dict(value, _to_plain)
+    if isinstance(value, list):
+        return _convert_list(value, _to_plain)
+    if isinstance(value, tuple):
+        return _convert_tuple(value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return _dataclass_to_plain(value)
+    return value
@@ -22,42 +22,415 @@ from src.ut_components import setup
 
 setup(APP_NAME, CRASH_REPORT_URL)
 
+import atexit
+import base64
+import codecs
+import functools
 import json
 import os
+import socket
+import sqlite3
 import subprocess
-from dataclasses import dataclass
+import tempfile
+import threading
+import time
+import urllib.parse
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
 from src.ut_components.config import get_app_data_path, get_config_path
+from src.ut_components.kv import KV, flush_pending
+
+try:
+    import orjson
+except ImportError:  # optional, bw list output of large vaults is several MB of JSON
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+BW_SERVE_HOST = "127.0.0.1"
+BW_SERVE_STARTUP_TIMEOUT = 30
+BW_SERVE_REQUEST_TIMEOUT = 120
+# node closes keep-alive sockets idle for 5 s, reconnect a bit before that instead of racing it
+BW_SERVE_IDLE_RECONNECT = 4.0
+BW_PASSIVE_VERBS = ("help", "status", "list", "get")
+BW_STREAM_CHUNK_SIZE = 65536
 
 
 def run_subprocess(args: List[str], env: Optional[Dict[str, str]] = None):
-    return subprocess.run(args=args, check=False, text=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+    # stdout stays bytes, most of it goes straight to the json parser which takes bytes too
+    return subprocess.run(args=args, check=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
 
 
-@dataclass
 class BWResult:
-    code: int
-    data: str
+    # a plain slotted class, dataclass fields with defaults cannot be combined with __slots__ before 3.10
+    __slots__ = ("code", "raw", "payload", "text")
+
+    def __init__(self, code: int, raw: bytes = b"", payload: Any = None, text: Optional[str] = None):
+        self.code = code
+        # raw stdout of the bw command, decoded into text only when data is read
+        self.raw = raw
+        # decoded form of the output, filled on the first json() call or directly by bw serve responses
+        self.payload = payload
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"BWResult(code={self.code!r}, raw={self.raw!r}, payload={self.payload!r}, text={self.text!r})"
+
+    @property
+    def data(self) -> str:
+        if self.text is None:
+            self.text = self.raw.decode("utf-8", errors="replace")
+        return self.text
 
     def json(self):
-        return json.loads(self.data)
+        if self.payload is None:
+            self.payload = _json_loads(self.raw if self.text is None else self.text)
+        return self.payload
 
 
-def run_bw(args: List[str], env: Optional[Dict[str, str]] = None) -> BWResult:
-    final_env = {"XDG_CONFIG_HOME": get_config_path()}
+@functools.lru_cache(maxsize=1)
+def _bw_path() -> str:
+    return os.path.join(get_app_data_path(), "bw")
+
+
+@functools.lru_cache(maxsize=1)
+def _bw_base_env() -> Dict[str, str]:
+    # inherit PATH, HOME, locale and proxy settings, the session is only ever passed explicitly
+    env = {key: value for key, value in os.environ.items() if key != "BW_SESSION"}
+    env["XDG_CONFIG_HOME"] = get_config_path()
+    return env
+
+
+def bw_env(env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    # the base env is shared between calls, never hand it out for mutation
     if env:
-        final_env.update(env)
+        return {**_bw_base_env(), **env}
+    return _bw_base_env()
+
+
+class BWServe:
+    def __init__(self, session_code: str):
+        self.session_code = session_code
+        with socket.socket() as sock:
+            sock.bind((BW_SERVE_HOST, 0))
+            self.port = sock.getsockname()[1]
+        self.process = subprocess.Popen(
+            [
+                _bw_path(),
+                "serve",
+                "--hostname",
+                BW_SERVE_HOST,
+                "--port",
+                str(self.port),
+                "--nointeraction",
+            ],
+            env=bw_env({"BW_SESSION": session_code}),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # http.client drags in email and ssl, so only pay for it once bw serve is actually used
+        import http.client
+
+        self.connection = http.client.HTTPConnection(BW_SERVE_HOST, self.port, timeout=BW_SERVE_REQUEST_TIMEOUT)
+        self.last_used = 0.0
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def wait_ready(self) -> bool:
+        deadline = time.monotonic() + BW_SERVE_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if not self.alive():
+                return False
+            try:
+                self.request("GET", "/status")
+                return True
+            except OSError:
+                # not listening yet
+                time.sleep(0.1)
+            except Exception:
+                # it answered, but not with a successful status, it will not become usable
+                return False
+        return False
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None, idempotent: bool = True) -> Any:
+        if self.connection.sock is not None and time.monotonic() - self.last_used >= BW_SERVE_IDLE_RECONNECT:
+            self.connection.close()
+        reused = self.connection.sock is not None
+        try:
+            response = self._exchange(method, path, body)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # serve dropped the kept-alive socket between requests, retry once on a fresh one. a reset
+            # while reading (RemoteDisconnected is one) may come after serve applied the request, so
+            # requests that must not run twice are only retried when the send itself failed
+            if not reused or not self.alive() or not (idempotent or isinstance(e, BrokenPipeError)):
+                raise
+            response = self._exchange(method, path, body)
+        self.last_used = time.monotonic()
+        payload = _json_loads(response)
+        if not payload.get("success"):
+            raise Exception(payload.get("message") or response.decode("utf-8", errors="ignore"))
+        return payload.get("data")
+
+    def _exchange(self, method: str, path: str, body: Optional[bytes]) -> bytes:
+        import http.client
+
+        try:
+            if body is None:
+                self.connection.request(method, path)
+            else:
+                self.connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            return self.connection.getresponse().read()
+        except OSError:
+            self.connection.close()
+            raise
+        except http.client.HTTPException as e:
+            self.connection.close()
+            raise ConnectionError(str(e)) from e
+
+    def stop(self):
+        self.connection.close()
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+_BW_SERVE: Optional[BWServe] = None
+_BW_SERVE_DISABLED = False
+# process wide copy of "config.bw_serve", only this module writes the key
+_BW_SERVE_ENABLED: Optional[bool] = None
+# the connection is shared by the ui calls and the background sync started after login
+_BW_SERVE_LOCK = threading.RLock()
+
+
+def _kill_stale_bw_serve():
+    try:
+        with KV() as kv:
+            pid = kv.get("bw.serve_pid")
+            kv.delete("bw.serve_pid")
+    except sqlite3.Error:
+        # best effort, a busy database must not stop serve from starting
+        return
+    if not pid:
+        return
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().split(b"\0")
+    except OSError:
+        return
+    if b"serve" in cmdline and any(arg.endswith(b"bw") or arg.endswith(b"bw.js") for arg in cmdline):
+        try:
+            os.kill(pid, 15)
+        except OSError:
+            pass
+
+
+def get_bw_serve_enabled() -> bool:
+    global _BW_SERVE_ENABLED
+    if _BW_SERVE_ENABLED is None:
+        with KV() as kv:
+            _BW_SERVE_ENABLED = bool(kv.get("config.bw_serve", False))
+    return _BW_SERVE_ENABLED
 
-    bw_command = [os.path.join(get_app_data_path(), "bw"), *args, "--raw", "--nointeraction"]
-    result = run_subprocess(bw_command, env=final_env)
+
+def set_bw_serve_enabled(enabled: bool):
+    # bw serve answers anyone who can reach its port on 127.0.0.1, no authentication, with the
+    # unlocked vault, so it stays off unless the user explicitly trades that for speed
+    global _BW_SERVE_ENABLED
+    with KV() as kv:
+        kv.put("config.bw_serve", enabled)
+    _BW_SERVE_ENABLED = enabled
+    if not enabled:
+        stop_bw_serve()
+
+
+def _get_bw_serve(session_code: str) -> Optional[BWServe]:
+    global _BW_SERVE, _BW_SERVE_DISABLED
+    if _BW_SERVE is not None and _BW_SERVE.session_code == session_code and _BW_SERVE.alive():
+        return _BW_SERVE
+    if _BW_SERVE_DISABLED or not get_bw_serve_enabled():
+        return None
+
+    stop_bw_serve()
+    _kill_stale_bw_serve()
+    serve = BWServe(session_code)
+    if not serve.wait_ready():
+        serve.stop()
+        _BW_SERVE_DISABLED = True
+        return None
+
+    # reachable by stop_bw_serve and atexit before anything else can fail
+    _BW_SERVE = serve
+    try:
+        with KV() as kv:
+            kv.put("bw.serve_pid", serve.process.pid)
+    except sqlite3.Error:
+        # without the pid a crash would leave it running with the unlocked session, rather not run it
+        stop_bw_serve()
+        return None
+    return serve
+
+
+def stop_bw_serve():
+    global _BW_SERVE
+    flush_pending()
+    with _BW_SERVE_LOCK:
+        if _BW_SERVE is None:
+            return
+        _BW_SERVE.stop()
+        _BW_SERVE = None
+
+
+atexit.register(stop_bw_serve)
+
+
+def _bw_serve_route(args: List[str]) -> Optional[Tuple[str, str, Optional[bytes]]]:
+    if args[:2] == ["list", "items"]:
+        return "GET", "/list/object/items?trash=true" if "--trash" in args[2:] else "/list/object/items", None
+    if args[:2] == ["get", "item"] and len(args) == 3:
+        return "GET", f"/object/item/{urllib.parse.quote(args[2])}", None
+    if args == ["sync"]:
+        return "POST", "/sync", None
+    # mutations go through serve as well, it updates its in-memory vault and the data file
+    # the cli reads, so it no longer has to be restarted after each edit
+    if args[:2] == ["create", "item"] and len(args) == 3:
+        return "POST", "/object/item", base64.b64decode(args[2])
+    if args[:2] == ["edit", "item"] and len(args) == 4:
+        return "PUT", f"/object/item/{urllib.parse.quote(args[2])}", base64.b64decode(args[3])
+    if args[:2] == ["delete", "item"] and len(args) >= 3 and args[3:] in ([], ["--permanent"]):
+        query = "?permanent=true" if args[3:] else ""
+        return "DELETE", f"/object/item/{urllib.parse.quote(args[2])}{query}", None
+    if args[:2] == ["restore", "item"] and len(args) == 3:
+        return "POST", f"/restore/item/{urllib.parse.quote(args[2])}", None
+    return None
+
+
+def _run_bw_serve(args: List[str], session_code: str) -> Optional[BWResult]:
+    route = _bw_serve_route(args)
+    if route is None:
+        return None
+    method, path, body = route
+    with _BW_SERVE_LOCK:
+        serve = _get_bw_serve(session_code)
+        if serve is None:
+            return None
+        # creating twice duplicates the item, every other routed command can safely be repeated
+        idempotent = args[0] != "create"
+        try:
+            data = serve.request(method, path, body, idempotent=idempotent)
+        except (OSError, ValueError) as e:
+            # stale keep-alive sockets are already retried inside request, so serve is dead or broken here
+            stop_bw_serve()
+            if not idempotent:
+                # serve may have applied the create, running it again through the cli could duplicate it
+                raise Exception(f"bw serve failed while creating the item: {e}") from e
+            return None
+
+    if args[0] == "list":
+        return BWResult(code=0, payload=data.get("data", []))
+    if args[0] == "sync":
+        return BWResult(code=0, text=(data or {}).get("title") or "")
+    if args[0] in ("delete", "restore"):
+        return BWResult(code=0)
+    return BWResult(code=0, payload=data)
+
+
+def run_bw(args: List[str], env: Optional[Dict[str, str]] = None) -> BWResult:
+    # bw can take seconds and serve is shared behind a lock, never hold the kv write lock meanwhile
+    flush_pending()
+    session_code = env.get("BW_SESSION") if env else None
+    if session_code:
+        result = _run_bw_serve(args, session_code)
+        if result is not None:
+            return result
+    if args and args[0] not in BW_PASSIVE_VERBS:
+        # bw serve keeps the vault in memory, restart it after anything that may change it
+        stop_bw_serve()
+
+    bw_command = [_bw_path(), *args, "--raw", "--nointeraction"]
+    result = run_subprocess(bw_command, env=bw_env(env))
     if result.returncode != 0:
-        raise Exception(result.stdout)
-    return BWResult(code=result.returncode, data=result.stdout.strip())
+        raise Exception(result.stdout.decode("utf-8", errors="replace"))
+    return BWResult(code=result.returncode, raw=result.stdout.strip())
+
+
+def _iter_json_array(stream: IO[bytes]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    opened = False
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if not opened:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+                yield value
+                continue
+            except json.JSONDecodeError:
+                # the element is most likely cut at the end of the buffer, read more before giving up
+                if eof:
+                    raise
+        elif eof:
+            if opened:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        chunk = stream.read1(BW_STREAM_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+        position = 0
+
+
+def run_bw_stream(args: List[str], env: Optional[Dict[str, str]] = None) -> Iterator[Any]:
+    flush_pending()
+    session_code = env.get("BW_SESSION") if env else None
+    if session_code:
+        result = _run_bw_serve(args, session_code)
+        if result is not None:
+            yield from result.json()
+            return
+
+    bw_command = [_bw_path(), *args, "--raw", "--nointeraction"]
+    with tempfile.TemporaryFile() as errors, subprocess.Popen(
+        bw_command, env=bw_env(env), stdout=subprocess.PIPE, stderr=errors
+    ) as process:
+        try:
+            yield from _iter_json_array(process.stdout)
+        except ValueError:
+            if process.wait() == 0:
+                raise
+        if process.wait() != 0:
+            errors.seek(0)
+            raise Exception(errors.read().decode("utf-8", errors="ignore"))
+
+
+@functools.lru_cache(maxsize=1)
+def _month_names() -> Tuple[str, ...]:
+    # %B follows the locale the ui set up, so the names come from strftime once instead of a fixed table
+    return tuple(datetime(2000, month, 1).strftime("%B") for month in range(1, 13))
 
 
 def parse_bw_date(dt: str) -> str:
     if not dt:
         return ""
+    # bw always sends YYYY-MM-DDTHH:MM:SS.fffZ, format it by slicing instead of building a datetime
+    if len(dt) >= 16 and dt[4] == "-" and dt[7] == "-" and dt[10] == "T" and dt[13] == ":":
+        month = dt[5:7]
+        if month.isdigit() and "01" <= month <= "12" and dt[8:10].isdigit():
+            return f"{_month_names()[int(month) - 1]} {dt[8:10]}, {dt[0:4]}. {dt[11:16]}"
     return datetime.fromisoformat(dt.replace("Z", "")).strftime("%B %d, %Y. %H:%M")